@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the Bank Service API
+
+Usage:
+    python benchmark.py
+    python benchmark.py --workload contention --concurrency 32 --duration 30
+    python benchmark.py --output results/baseline.json
+
+Seeds a fresh SQLite database with generate_data.py (same --seed, same
+data), starts the app under uvicorn against it and drives each workload
+with a fixed number of concurrent clients for --duration seconds after a
+--warmup period:
+
+    listing     paged customer, account and credit card listings
+    contention  deposits and withdrawals spread over a few hot accounts
+    history     transaction history and statement reads
+    mixed       all of the above, read-heavy
+
+Latency percentiles (p50/p95/p99) and requests per second are written as
+JSON together with the git commit, so runs on the same machine can be
+compared across commits. The load generator shares the machine with the
+server; keep --concurrency and the host constant between runs you compare.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+from sqlalchemy import create_engine
+
+import generate_data
+import migrations
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKLOADS = ("listing", "contention", "history", "mixed")
+STARTUP_TIMEOUT_SECONDS = 30
+SEED_START = datetime(2024, 1, 1)
+
+def seed_database(url: str, customers: int, accounts_per_customer: int, transactions_per_account: int, seed: int):
+    """Create the schema and a deterministic dataset; returns the account ids."""
+    engine = create_engine(url)
+    migrations.upgrade(engine)
+    accounts = customers * accounts_per_customer
+    with engine.connect() as conn:
+        generate_data.generate(
+            conn, customers, accounts_per_customer, card_rate=1.0, transactions=accounts * transactions_per_account,
+            seed=seed, start=SEED_START, days=365,
+        )
+    engine.dispose()
+    return list(range(1, accounts + 1))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(database_url: str, port: int, extra_env: dict):
+    # The slow-query log runs EXPLAIN on slow statements, which skews results
+    env = {"SLOW_QUERY_MS": "-1", **os.environ, "DATABASE_URL": database_url, **extra_env}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR, env=env,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start in time")
+
+def build_operations(workload: str, account_ids: list, customers: int, hot_accounts: int):
+    """Weighted (name, weight, request factory) triples for a workload."""
+    hot = account_ids[:hot_accounts]
+
+    def page(path, count):
+        return lambda rng: ("GET", f"{path}?limit=100&after_id={rng.randrange(0, max(count - 100, 1))}", None)
+
+    def movement(kind):
+        return lambda rng: ("POST", f"/checking-accounts/{rng.choice(hot)}/{kind}", {"amount": "1.00"})
+
+    def account_path(suffix):
+        return lambda rng: ("GET", f"/checking-accounts/{rng.choice(account_ids)}{suffix}", None)
+
+    listing = [
+        ("list_customers", 4, page("/customers/", customers)),
+        ("list_accounts", 4, page("/checking-accounts/", len(account_ids))),
+        ("list_credit_cards", 2, page("/credit-cards/", customers)),
+    ]
+    contention = [
+        ("deposit", 1, movement("deposit")),
+        ("withdraw", 1, movement("withdraw")),
+    ]
+    history = [
+        ("transaction_history", 3, account_path("/transactions")),
+        ("statements", 1, account_path("/statements")),
+        ("get_account", 2, account_path("")),
+    ]
+    if workload == "mixed":
+        return listing + history + [(name, weight * 2, factory) for name, weight, factory in contention]
+    return {"listing": listing, "contention": contention, "history": history}[workload]
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    summary = {"requests": len(latencies), "errors": errors, "rps": round(len(latencies) / elapsed, 1)}
+    if latencies:
+        summary["latency_ms"] = {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+        }
+    return summary
+
+async def run_workload(base_url: str, operations: list, concurrency: int, duration: float, warmup: float, seed: int) -> dict:
+    names = [name for name, _, _ in operations]
+    weights = [weight for _, weight, _ in operations]
+    factories = {name: factory for name, _, factory in operations}
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    # Completion time of the last measured request; rps is over the measured window
+    measured_until = None
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        stop_at = measure_from + duration
+
+        async def worker(worker_id: int):
+            nonlocal measured_until
+            rng = random.Random(seed * 1000 + worker_id)
+            while True:
+                name = rng.choices(names, weights)[0]
+                method, path, body = factories[name](rng)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                elapsed = time.perf_counter() - started
+                now = loop.time()
+                if now >= stop_at:
+                    return
+                if now >= measure_from:
+                    measured_until = now
+                    if failed:
+                        errors[name] += 1
+                    else:
+                        latencies[name].append(elapsed)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    elapsed = measured_until - measure_from if measured_until is not None else duration
+    all_latencies = [value for values in latencies.values() for value in values]
+    result = summarize(all_latencies, sum(errors.values()), elapsed)
+    result["operations"] = {name: summarize(latencies[name], errors[name], elapsed) for name in names}
+    return result
+
+def git_commit() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=SERVICE_DIR, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Bank Service API")
+    parser.add_argument("--workload", choices=WORKLOADS + ("all",), default="all")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds per workload")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before each workload")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--accounts-per-customer", type=int, default=2)
+    parser.add_argument("--transactions-per-account", type=int, default=20)
+    parser.add_argument("--hot-accounts", type=int, default=5, help="accounts shared by the contention workload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default benchmark-results/<commit>-<time>.json)")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra server environment, e.g. --env DB_ASYNC=1")
+    args = parser.parse_args(argv)
+
+    workloads = WORKLOADS if args.workload == "all" else (args.workload,)
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    revision = git_commit()
+    results = {
+        **revision,
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "workloads": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="bank-benchmark-") as tmp:
+        for workload in workloads:
+            # Every workload starts from the same freshly seeded database
+            database_url = f"sqlite:///{os.path.join(tmp, workload + '.db')}"
+            account_ids = seed_database(
+                database_url, args.customers, args.accounts_per_customer, args.transactions_per_account, args.seed)
+            port = free_port()
+            server = start_server(database_url, port, extra_env)
+            try:
+                operations = build_operations(workload, account_ids, args.customers, args.hot_accounts)
+                results["workloads"][workload] = asyncio.run(run_workload(
+                    f"http://127.0.0.1:{port}", operations, args.concurrency, args.duration, args.warmup, args.seed))
+            finally:
+                server.terminate()
+                server.wait()
+            summary = results["workloads"][workload]
+            print(json.dumps({"workload": workload, "rps": summary["rps"], **summary.get("latency_ms", {})}))
+
+    output = args.output or os.path.join(
+        "benchmark-results", f"{(revision['commit'] or 'unknown')[:12]}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds.
+
+    Lookups and inserts are O(1). Expired entries are dropped when they are
+    next read or when they fall off the LRU end, so no sweeping is needed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ReadThroughCache:
+    """TTLCache that loads missing entries on demand and supports invalidation.
+
+    A load that started before the key was last invalidated is returned to
+    its caller but not stored, so a reader racing a writer cannot put the
+    pre-write value back into the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        # A ttl of 0 disables caching; every call loads
+        self.enabled = ttl > 0
+        self._entries = TTLCache(maxsize, ttl)
+        self._invalidated = TTLCache(maxsize, ttl)
+
+    def get_or_load(self, key, load):
+        if not self.enabled:
+            return load()
+        value = self._entries.get(key)
+        if value is not None:
+            return value
+        started = time.monotonic()
+        value = load()
+        if value is not None:
+            invalidated_at = self._invalidated.get(key)
+            if invalidated_at is None or invalidated_at < started:
+                self._entries.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        self._invalidated.set(key, time.monotonic())
+        self._entries.pop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._invalidated.clear()
+
+def strong_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so ignore any W/ prefix
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
@@ -1,12 +1,19 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from main import app
+# Tests build their schema directly rather than through migrations
+os.environ.setdefault("DB_SCHEMA_CHECK", "off")
+
+from main import app, entity_cache
 from database import get_db
 from models import Base
+import metrics
+import idempotency
 
 # Test database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -16,6 +23,7 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+metrics.instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def override_get_db():
@@ -40,6 +48,8 @@ def db_session():
 @pytest.fixture(scope="function")
 def client():
     Base.metadata.create_all(bind=engine)
+    idempotency.response_cache.clear()
+    entity_cache.clear()
     with TestClient(app) as c:
         yield c
     Base.metadata.drop_all(bind=engine)
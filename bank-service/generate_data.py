@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Script to fill the bank database with a synthetic dataset for scale testing
+
+Usage:
+    python generate_data.py
+    python generate_data.py --customers 1000000 --transactions 10000000
+    DATABASE_URL=sqlite:///./scale.db python generate_data.py --seed 7
+
+The same arguments and --seed always produce the same data. Activity is
+skewed the way real ledgers are: each account's share of the transactions
+is drawn from a Pareto distribution, so a few whale accounts carry a large
+part of the volume while most accounts see little.
+
+Transactions are generated in time order, one month at a time, so balances
+stay non-negative and consistent with the ledger and the monthly statement
+rollups are computed on the fly rather than rebuilt afterwards. Rows are
+written with bulk inserts in --batch-size chunks. Secondary indexes are
+dropped for the load and built once at the end.
+"""
+import argparse
+import calendar
+import json
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import bindparam, func, insert, select, update
+
+import models
+import slow_queries
+import migrations
+from database import engine
+
+DEFAULT_BATCH_SIZE = 50000
+# alpha ~1.16 gives the classic 80/20 split of activity across accounts
+PARETO_ALPHA = 1.16
+MAX_WEIGHT = 1000
+WITHDRAWAL_RATE = 0.4
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Aisha"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Nguyen"]
+
+@contextmanager
+def deferred_indexes(conn, tables):
+    """Drop the tables' secondary indexes for a bulk load and build them once it is done.
+
+    Unique constraints stay in place; they are part of the table definition.
+    """
+    indexes = [index for table in tables for index in table.indexes]
+    for index in indexes:
+        index.drop(conn, checkfirst=True)
+    conn.commit()
+    yield
+    for index in indexes:
+        index.create(conn)
+    conn.commit()
+
+def reset_id_sequences(conn, tables):
+    """Move PostgreSQL id sequences past the ids the load inserted explicitly,
+    so the API's next insert does not reuse one; SQLite already uses max(id) + 1."""
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        max_id = select(func.max(table.c.id)).scalar_subquery()
+        # An empty table restarts its sequence at 1
+        conn.execute(select(func.setval(
+            func.pg_get_serial_sequence(table.name, "id"), func.coalesce(max_id, 1), max_id.isnot(None)
+        )))
+
+def pareto_weight(rng: random.Random) -> float:
+    # Capped so one whale can't swallow most of a small dataset
+    return min(rng.paretovariate(PARETO_ALPHA), MAX_WEIGHT)
+
+def insert_batches(conn, table, rows, batch_size):
+    """Insert an iterable of row dicts in batches, committing after each."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.execute(insert(table), batch)
+            conn.commit()
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+        conn.commit()
+
+def months_between(start: datetime, end: datetime):
+    """Yield (month start, month end) pairs covering start..end."""
+    current = start
+    while current < end:
+        last_day = calendar.monthrange(current.year, current.month)[1]
+        next_month = datetime(current.year, current.month, last_day) + timedelta(days=1)
+        yield current, min(next_month, end)
+        current = next_month
+
+class LedgerGenerator:
+    """Generates transactions and statement rollups one month at a time.
+
+    Amounts and balances are kept in integer cents while generating.
+    """
+
+    def __init__(self, rng: random.Random, accounts: int, transactions: int, start: datetime, days: int):
+        self.rng = rng
+        self.accounts = accounts
+        self.transactions = transactions
+        self.start = start
+        self.end = start + timedelta(days=days)
+        self.balances = [0] * (accounts + 1)
+        self.cum_weights = list(accumulate(pareto_weight(rng) for _ in range(accounts)))
+        # account id -> [opening, deposit total, deposit count, withdrawal total, withdrawal count]
+        self.rollups = {}
+
+    def schedule(self):
+        """Yield (month start, month end, transaction count), spreading
+        transactions over months in proportion to their length."""
+        total_seconds = (self.end - self.start).total_seconds()
+        generated = 0
+        for month_start, month_end in months_between(self.start, self.end):
+            target = round(self.transactions * (month_end - self.start).total_seconds() / total_seconds)
+            yield month_start, month_end, target - generated
+            generated = target
+
+    def _amount(self) -> int:
+        # Long-tailed amounts: mostly tens of dollars, occasionally thousands
+        return max(1, min(int(self.rng.lognormvariate(8.0, 1.3)), 5_000_000))
+
+    def transactions_for(self, month_start: datetime, month_end: datetime, count: int):
+        rng = self.rng
+        span = (month_end - month_start).total_seconds()
+        self.rollups = rollups = {}
+        chosen = rng.choices(range(1, self.accounts + 1), cum_weights=self.cum_weights, k=count)
+        for n, account_id in enumerate(chosen):
+            balance = self.balances[account_id]
+            rollup = rollups.get(account_id)
+            if rollup is None:
+                rollup = rollups[account_id] = [balance, 0, 0, 0, 0]
+            amount = self._amount()
+            if balance >= amount and rng.random() < WITHDRAWAL_RATE:
+                kind = "withdrawal"
+                self.balances[account_id] = balance - amount
+                rollup[3] += amount
+                rollup[4] += 1
+            else:
+                kind = "deposit"
+                self.balances[account_id] = balance + amount
+                rollup[1] += amount
+                rollup[2] += 1
+            yield {
+                "account_id": account_id,
+                "transaction_type": kind,
+                "amount": amount / 100,
+                "description": kind.capitalize(),
+                "created_at": month_start + timedelta(seconds=(n + rng.random()) * span / count),
+            }
+
+    def statements_for(self, month_start: datetime):
+        """Rollups of the month whose transactions were generated last."""
+        month = month_start.strftime("%Y-%m")
+        for account_id, (opening, deposit_total, deposit_count, withdrawal_total, withdrawal_count) in sorted(self.rollups.items()):
+            yield {
+                "account_id": account_id,
+                "month": month,
+                "opening_balance": opening / 100,
+                "closing_balance": self.balances[account_id] / 100,
+                "deposit_total": deposit_total / 100,
+                "deposit_count": deposit_count,
+                "withdrawal_total": withdrawal_total / 100,
+                "withdrawal_count": withdrawal_count,
+            }
+
+def generate(conn, customers: int, accounts_per_customer: float, card_rate: float, transactions: int,
+             seed: int, start: datetime, days: int, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """Load a dataset into empty tables through conn; returns row counts."""
+    rng = random.Random(seed)
+    accounts = int(customers * accounts_per_customer)
+    opened = start - timedelta(days=30)
+
+    def customer_rows():
+        for i in range(1, customers + 1):
+            yield {
+                "id": i,
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": rng.choice(LAST_NAMES),
+                "email": f"customer{i}@example.com",
+                "created_at": opened,
+            }
+
+    def account_rows():
+        for i in range(1, accounts + 1):
+            # Every customer gets one account; the extra ones go to random customers
+            customer_id = i if i <= customers else rng.randint(1, customers)
+            yield {"id": i, "account_number": f"ACC{i:012d}", "balance": 0, "customer_id": customer_id,
+                   "created_at": opened, "is_active": True}
+
+    def card_rows():
+        card_id = 0
+        for customer_id in range(1, customers + 1):
+            if rng.random() < card_rate:
+                card_id += 1
+                yield {"id": card_id, "card_number": f"4{card_id:015d}", "customer_id": customer_id,
+                       "credit_limit": rng.choice((500, 1000, 2500, 5000, 10000, 25000)),
+                       "current_balance": 0, "created_at": opened, "is_active": True}
+
+    tables = [models.Customer.__table__, models.CheckingAccount.__table__, models.CreditCard.__table__,
+              models.Transaction.__table__, models.AccountStatement.__table__]
+    counts = {}
+    with deferred_indexes(conn, tables):
+        insert_batches(conn, models.Customer.__table__, customer_rows(), batch_size)
+        insert_batches(conn, models.CheckingAccount.__table__, account_rows(), batch_size)
+        insert_batches(conn, models.CreditCard.__table__, card_rows(), batch_size)
+
+        ledger = LedgerGenerator(rng, accounts, transactions, start, days)
+        for month_start, month_end, count in ledger.schedule():
+            insert_batches(conn, models.Transaction.__table__, ledger.transactions_for(month_start, month_end, count), batch_size)
+            insert_batches(conn, models.AccountStatement.__table__, ledger.statements_for(month_start), batch_size)
+
+        # Accounts were inserted empty; store where their ledgers ended up
+        account = models.CheckingAccount.__table__
+        set_balance = update(account).where(account.c.id == bindparam("account_id")).values(balance=bindparam("final_balance"))
+        final_balances = [
+            {"account_id": account_id, "final_balance": cents / 100}
+            for account_id, cents in enumerate(ledger.balances) if cents
+        ]
+        for i in range(0, len(final_balances), batch_size):
+            conn.execute(set_balance, final_balances[i:i + batch_size])
+            conn.commit()
+        reset_id_sequences(conn, [models.Customer.__table__, models.CheckingAccount.__table__, models.CreditCard.__table__])
+        conn.commit()
+
+    for table in tables:
+        counts[table.name] = conn.execute(select(func.count()).select_from(table)).scalar()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic bank dataset")
+    parser.add_argument("--customers", type=int, default=100000)
+    parser.add_argument("--accounts-per-customer", type=float, default=1.5)
+    parser.add_argument("--card-rate", type=float, default=0.6, help="share of customers with a credit card")
+    parser.add_argument("--transactions", type=int, default=1000000)
+    parser.add_argument("--start", type=datetime.fromisoformat, default=datetime(2024, 1, 1), help="first transaction date")
+    parser.add_argument("--days", type=int, default=365, help="days of history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    migrations.upgrade(engine)
+    # Bulk batches are slow by design; keep them out of the slow-query log
+    if slow_queries.slow_query_log.enabled:
+        slow_queries.slow_query_log.remove(engine)
+    started = time.monotonic()
+    with engine.connect() as conn:
+        tables = [models.Customer.__table__, models.CheckingAccount.__table__, models.Transaction.__table__]
+        if any(conn.execute(select(func.count()).select_from(table)).scalar() for table in tables):
+            sys.exit("generate_data.py needs empty tables; point DATABASE_URL at a new database")
+        if engine.dialect.name == "sqlite":
+            # Losing a half-generated dataset to a crash is fine; skip the fsyncs
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        counts = generate(conn, args.customers, args.accounts_per_customer, args.card_rate, args.transactions,
+                          args.seed, args.start, args.days, args.batch_size)
+    print(json.dumps({"rows": counts, "seconds": round(time.monotonic() - started, 1)}))
+
+if __name__ == "__main__":
+    main()
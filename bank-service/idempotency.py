@@ -0,0 +1,124 @@
+"""Idempotency-Key support for money movement endpoints.
+
+The first successful response for a key is stored in the idempotency_keys
+table in the same DB transaction as the money movement, so a retry can never
+post twice. The key is bound to the request path and a hash of the request
+body; reusing it for a different request is rejected with a 422. Replays
+are served from a bounded in-process LRU when possible and otherwise from
+an indexed lookup; neither takes a write lock. Old keys are deleted by a
+background thread, never on the request path.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Keys are honoured for at least this long; the purger removes older ones
+KEY_RETENTION_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_RETENTION_SECONDS", 24 * 60 * 60))
+PURGE_INTERVAL_SECONDS = int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", 10 * 60))
+
+# Recently used keys, as (scope, request hash, response body) tuples
+response_cache = TTLCache(
+    maxsize=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000)),
+    ttl=int(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", 10 * 60)),
+)
+
+def _canonical(value):
+    if isinstance(value, Decimal):
+        # 100, 100.0 and 100.00 are the same amount
+        return str(value.normalize())
+    return jsonable_encoder(value)
+
+def request_hash(payload: BaseModel) -> str:
+    """SHA-256 of the validated request body in a canonical JSON form."""
+    canonical = json.dumps(payload.model_dump(), sort_keys=True, separators=(",", ":"), default=_canonical)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def _replay(scope: str, body_hash: str, stored_scope: str, stored_hash: Optional[str], body: dict,
+            response: Response) -> dict:
+    # Keys stored before request hashes were recorded have none to compare
+    if stored_scope != scope or (stored_hash is not None and stored_hash != body_hash):
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+def replay(db: Session, key: Optional[str], scope: str, body_hash: str, response: Response) -> Optional[dict]:
+    """Return the stored response for key, or None if it has not been used."""
+    if not key:
+        return None
+    cached = response_cache.get(key)
+    if cached is not None:
+        return _replay(scope, body_hash, *cached, response)
+
+    stored = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+    if stored is None:
+        return None
+    body = json.loads(stored.response_body)
+    response_cache.set(key, (stored.scope, stored.request_hash, body))
+    return _replay(scope, body_hash, stored.scope, stored.request_hash, body, response)
+
+def commit(db: Session, key: Optional[str], scope: str, body_hash: str, body: dict, response: Response) -> dict:
+    """Commit the pending transaction, recording body under key if one was sent.
+
+    If a concurrent request with the same key committed first, this
+    transaction is rolled back and that request's response is returned.
+    """
+    if not key:
+        db.commit()
+        return body
+
+    body = jsonable_encoder(body)
+    db.add(models.IdempotencyKey(key=key, scope=scope, request_hash=body_hash, response_body=json.dumps(body)))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        replayed = replay(db, key, scope, body_hash, response)
+        if replayed is None:
+            raise
+        return replayed
+    response_cache.set(key, (scope, body_hash, body))
+    return body
+
+def purge_expired(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=KEY_RETENTION_SECONDS)
+    deleted = (
+        db.query(models.IdempotencyKey)
+        .filter(models.IdempotencyKey.created_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+def start_purger(session_factory, interval: float = PURGE_INTERVAL_SECONDS):
+    """Purge expired keys every interval seconds until the returned event is set."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            db = session_factory()
+            try:
+                purge_expired(db)
+            except Exception:
+                logger.exception("Failed to purge expired idempotency keys")
+                db.rollback()
+            finally:
+                db.close()
+
+    threading.Thread(target=run, name="idempotency-purger", daemon=True).start()
+    return stop
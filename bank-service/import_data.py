@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Script to bulk import customers and checking accounts from CSV or NDJSON files
+
+Usage:
+    python import_data.py customers customers.csv
+    python import_data.py accounts accounts.ndjson --chunk-size 5000
+
+Rows are read lazily and inserted in chunks with SQLAlchemy Core bulk inserts,
+committing once per chunk. Rows that conflict with existing data (duplicate
+email or account number, unknown customer) or fail validation are reported
+one JSON line each on stderr and skipped; the rest of the chunk still loads.
+"""
+import argparse
+import csv
+import json
+import sys
+from itertools import islice
+from typing import NamedTuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+import models
+import schemas
+import migrations
+from database import SessionLocal, engine
+
+DEFAULT_CHUNK_SIZE = 1000
+
+class UnreadableRow(NamedTuple):
+    """Stands in for a line that could not be parsed; reported as a conflict."""
+    detail: str
+
+def read_rows(path):
+    """Yield (line_number, row) pairs from a CSV file or NDJSON file.
+
+    A line that is not valid JSON yields an UnreadableRow instead of ending
+    the import.
+    """
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            # Line 1 is the header
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, UnreadableRow(f"Invalid JSON: {e.msg}")
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _validate(chunk, schema):
+    valid, conflicts = [], []
+    for line_number, row in chunk:
+        if isinstance(row, UnreadableRow):
+            conflicts.append({"line": line_number, "detail": row.detail})
+            continue
+        if not isinstance(row, dict):
+            conflicts.append({"line": line_number, "detail": "Invalid row: expected an object"})
+            continue
+        if None in row:
+            # csv.DictReader files values beyond the header under None
+            conflicts.append({"line": line_number, "detail": "Invalid row: more values than header columns"})
+            continue
+        try:
+            valid.append((line_number, schema(**row).model_dump()))
+        except ValidationError as e:
+            conflicts.append({"line": line_number, "detail": f"Invalid row: {e.errors()[0]['msg']}"})
+    return valid, conflicts
+
+def _insert_chunk(db, table, rows):
+    """Bulk insert rows, falling back to per-row savepoints if a concurrent
+    writer created a conflicting row after the pre-checks ran."""
+    if not rows:
+        return []
+    try:
+        db.execute(insert(table), [values for _, values in rows])
+        return []
+    except IntegrityError:
+        db.rollback()
+
+    conflicts = []
+    for line_number, values in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(table), values)
+        except IntegrityError:
+            conflicts.append({"line": line_number, "detail": "Unique constraint violated"})
+    return conflicts
+
+def import_customer_chunk(db, chunk):
+    """Insert one chunk of customer rows; returns (inserted, conflicts)."""
+    rows, conflicts = _validate(chunk, schemas.CustomerCreate)
+
+    emails = {values["email"] for _, values in rows}
+    taken = set(db.execute(select(models.Customer.email).where(models.Customer.email.in_(emails))).scalars())
+
+    to_insert = []
+    for line_number, values in rows:
+        if values["email"] in taken:
+            conflicts.append({"line": line_number, "detail": "Email already exists", "email": values["email"]})
+            continue
+        taken.add(values["email"])
+        to_insert.append((line_number, values))
+
+    insert_conflicts = _insert_chunk(db, models.Customer.__table__, to_insert)
+    db.commit()
+    return len(to_insert) - len(insert_conflicts), conflicts + insert_conflicts
+
+def import_account_chunk(db, chunk):
+    """Insert one chunk of checking account rows; returns (inserted, conflicts)."""
+    rows, conflicts = _validate(chunk, schemas.CheckingAccountCreate)
+
+    numbers = {values["account_number"] for _, values in rows}
+    customer_ids = {values["customer_id"] for _, values in rows}
+    taken = set(db.execute(
+        select(models.CheckingAccount.account_number).where(models.CheckingAccount.account_number.in_(numbers))
+    ).scalars())
+    known_customers = set(db.execute(
+        select(models.Customer.id).where(models.Customer.id.in_(customer_ids))
+    ).scalars())
+
+    to_insert = []
+    for line_number, values in rows:
+        if values["customer_id"] not in known_customers:
+            conflicts.append({"line": line_number, "detail": "Customer not found", "customer_id": values["customer_id"]})
+            continue
+        if values["account_number"] in taken:
+            conflicts.append({"line": line_number, "detail": "Account number already exists", "account_number": values["account_number"]})
+            continue
+        taken.add(values["account_number"])
+        to_insert.append((line_number, values))
+
+    insert_conflicts = _insert_chunk(db, models.CheckingAccount.__table__, to_insert)
+    db.commit()
+    return len(to_insert) - len(insert_conflicts), conflicts + insert_conflicts
+
+IMPORTERS = {
+    "customers": import_customer_chunk,
+    "accounts": import_account_chunk,
+}
+
+def run_import(db, kind, rows, chunk_size=DEFAULT_CHUNK_SIZE, report=sys.stderr):
+    """Import rows chunk by chunk, writing each conflict to report as a JSON line.
+
+    Returns a summary dict with inserted and conflict counts.
+    """
+    import_chunk = IMPORTERS[kind]
+    inserted = conflicted = 0
+    for chunk in chunked(rows, chunk_size):
+        chunk_inserted, conflicts = import_chunk(db, chunk)
+        inserted += chunk_inserted
+        conflicted += len(conflicts)
+        for conflict in conflicts:
+            report.write(json.dumps(conflict) + "\n")
+    return {"inserted": inserted, "conflicts": conflicted}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import bank data from CSV or NDJSON")
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("path", help="CSV (.csv) or NDJSON file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    migrations.upgrade(engine)
+    db = SessionLocal()
+    try:
+        summary = run_import(db, args.kind, read_rows(args.path), args.chunk_size)
+    finally:
+        db.close()
+    print(json.dumps(summary))
+
+if __name__ == "__main__":
+    main()
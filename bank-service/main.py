@@ -1,21 +1,105 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update, insert, func, bindparam
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 from decimal import Decimal
+from datetime import datetime
 import models
 import schemas
-from database import get_db, create_tables
+from database import get_db, engine, SessionLocal, DB_ASYNC, AsyncSessionRoute, sync_session_only
 import uuid
+import csv
+import io
+import os
+from contextlib import asynccontextmanager
+import idempotency
+import statements
+from cache import ReadThroughCache, strong_etag, etag_matches
+from responses import FastJSONResponse, fast_response
+import metrics
+import migrations
+import profiling
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if migrations.SCHEMA_CHECK:
+        migrations.check_schema(engine)
+    # Expired idempotency keys are purged in the background, off the request path
+    stop_purger = idempotency.start_purger(SessionLocal)
+    yield
+    stop_purger.set()
 
 app = FastAPI(
     title="Bank Service API",
     description="A banking API to manage checking accounts, deposits, withdrawals, and credit cards",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
-# Create tables on startup
-create_tables()
+if DB_ASYNC:
+    # Handlers run on an AsyncSession on the event loop instead of the threadpool
+    app.router.route_class = AsyncSessionRoute
+
+# Per-route latency, in-flight and SQL metrics, served on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Requests carrying the X-Profile token are profiled, see profiling.py
+app.add_middleware(profiling.ProfilingMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return metrics.metrics_response()
+
+# List endpoints page on the primary key; the last id of a full page is
+# returned in the X-Next-Cursor header and passed back as ?after_id=
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def paginate(query, model, after_id: Optional[int], limit: int, response: Response):
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
+
+# Single-entity reads are served from a per-process cache of serialized
+# responses. Writes invalidate their entry only in the worker that handled
+# them; other workers would keep serving the old body, balance included,
+# under a strong ETag until the TTL expires. So the cache is on by default
+# only when the app runs as a single worker (WEB_CONCURRENCY, exported by
+# run.py); setting ENTITY_CACHE_TTL_SECONDS opts in regardless. With the
+# cache off, ETags are computed from the current row on every read.
+def entity_cache_ttl(environ=os.environ) -> float:
+    if "ENTITY_CACHE_TTL_SECONDS" in environ:
+        return float(environ["ENTITY_CACHE_TTL_SECONDS"])
+    return 5.0 if int(environ.get("WEB_CONCURRENCY", 1)) == 1 else 0.0
+
+entity_cache = ReadThroughCache(
+    maxsize=int(os.getenv("ENTITY_CACHE_SIZE", 10000)),
+    ttl=entity_cache_ttl(),
+)
+
+def cached_entity_response(key, load, schema, if_none_match: Optional[str]) -> Optional[Response]:
+    def load_serialized():
+        entity = load()
+        if entity is None:
+            return None
+        body = schema.model_validate(entity).model_dump_json().encode()
+        return body, strong_etag(body)
+
+    cached = entity_cache.get_or_load(key, load_serialized)
+    if cached is None:
+        return None
+    body, etag = cached
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 # Customer endpoints
 @app.post("/customers/", response_model=schemas.Customer)
@@ -25,21 +109,33 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
         db.add(db_customer)
         db.commit()
         db.refresh(db_customer)
+        entity_cache.invalidate(("customer", db_customer.id))
         return db_customer
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Email already exists")
 
 @app.get("/customers/", response_model=List[schemas.Customer])
-def get_customers(db: Session = Depends(get_db)):
-    return db.query(models.Customer).all()
+def get_customers(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    rows = paginate(db.query(models.Customer), models.Customer, after_id, limit, response)
+    return fast_response(rows, schemas.Customer, response)
 
 @app.get("/customers/{customer_id}", response_model=schemas.Customer)
-def get_customer(customer_id: int, db: Session = Depends(get_db)):
-    customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
-    if not customer:
+def get_customer(customer_id: int, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    response = cached_entity_response(
+        ("customer", customer_id),
+        lambda: db.query(models.Customer).filter(models.Customer.id == customer_id).first(),
+        schemas.Customer,
+        if_none_match,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return customer
+    return response
 
 # Checking Account endpoints
 @app.post("/checking-accounts/", response_model=schemas.CheckingAccount)
@@ -53,77 +149,306 @@ def create_checking_account(account: schemas.CheckingAccountCreate, db: Session
     db.add(db_account)
     db.commit()
     db.refresh(db_account)
+    entity_cache.invalidate(("account", db_account.id))
     return db_account
 
 @app.get("/checking-accounts/", response_model=List[schemas.CheckingAccount])
-def get_checking_accounts(db: Session = Depends(get_db)):
-    return db.query(models.CheckingAccount).all()
+def get_checking_accounts(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    rows = paginate(db.query(models.CheckingAccount), models.CheckingAccount, after_id, limit, response)
+    return fast_response(rows, schemas.CheckingAccount, response)
 
 @app.get("/checking-accounts/{account_id}", response_model=schemas.CheckingAccount)
-def get_checking_account(account_id: int, db: Session = Depends(get_db)):
-    account = db.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).first()
-    if not account:
+def get_checking_account(account_id: int, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    response = cached_entity_response(
+        ("account", account_id),
+        lambda: db.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).first(),
+        schemas.CheckingAccount,
+        if_none_match,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Account not found")
-    return account
+    return response
+
+def adjust_balance(db: Session, account_id: int, delta: Decimal) -> Optional[Decimal]:
+    """Apply delta to an account balance in a single conditional UPDATE.
+
+    Returns the new balance, or None when the account does not exist or a
+    debit would overdraw it. The check and the write happen in one statement,
+    so concurrent requests cannot lose updates.
+    """
+    balance = models.CheckingAccount.balance
+    stmt = update(models.CheckingAccount).where(models.CheckingAccount.id == account_id)
+    if delta < 0:
+        stmt = stmt.where(balance >= -delta)
+    # Round in SQL so repeated updates do not accumulate float drift on SQLite
+    stmt = stmt.values(balance=func.round(balance + delta, 2)).returning(balance)
+    return db.execute(stmt, execution_options={"synchronize_session": False}).scalar_one_or_none()
 
 @app.post("/checking-accounts/{account_id}/deposit")
-def deposit_funds(account_id: int, deposit: schemas.DepositRequest, db: Session = Depends(get_db)):
-    account = db.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).first()
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
+def deposit_funds(
+    account_id: int,
+    deposit: schemas.DepositRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+):
+    scope = f"/checking-accounts/{account_id}/deposit"
+    body_hash = idempotency.request_hash(deposit)
+    replayed = idempotency.replay(db, idempotency_key, scope, body_hash, response)
+    if replayed is not None:
+        return replayed
     
     if deposit.amount <= 0:
         raise HTTPException(status_code=400, detail="Deposit amount must be positive")
     
-    account.balance += deposit.amount
+    new_balance = adjust_balance(db, account_id, deposit.amount)
+    if new_balance is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Account not found")
     
-    # Create transaction record
+    # Create transaction record and update the monthly rollup in the same DB
+    # transaction as the balance change
+    created_at = datetime.utcnow()
     transaction = models.Transaction(
         account_id=account_id,
         transaction_type="deposit",
         amount=deposit.amount,
-        description=deposit.description
+        description=deposit.description,
+        created_at=created_at
     )
     db.add(transaction)
-    db.commit()
-    db.refresh(account)
+    statements.record_posting(db, account_id, "deposit", deposit.amount, new_balance, created_at)
     
-    return {"message": f"Successfully deposited ${deposit.amount}", "new_balance": account.balance}
+    result = {"message": f"Successfully deposited ${deposit.amount}", "new_balance": new_balance}
+    result = idempotency.commit(db, idempotency_key, scope, body_hash, result, response)
+    entity_cache.invalidate(("account", account_id))
+    return result
 
 @app.post("/checking-accounts/{account_id}/withdraw")
-def withdraw_funds(account_id: int, withdrawal: schemas.WithdrawalRequest, db: Session = Depends(get_db)):
-    account = db.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).first()
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
+def withdraw_funds(
+    account_id: int,
+    withdrawal: schemas.WithdrawalRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+):
+    scope = f"/checking-accounts/{account_id}/withdraw"
+    body_hash = idempotency.request_hash(withdrawal)
+    replayed = idempotency.replay(db, idempotency_key, scope, body_hash, response)
+    if replayed is not None:
+        return replayed
     
     if withdrawal.amount <= 0:
         raise HTTPException(status_code=400, detail="Withdrawal amount must be positive")
     
-    if account.balance < withdrawal.amount:
+    new_balance = adjust_balance(db, account_id, -withdrawal.amount)
+    if new_balance is None:
+        # No row matched: tell a missing account apart from insufficient funds
+        exists = db.query(models.CheckingAccount.id).filter(models.CheckingAccount.id == account_id).first()
+        db.rollback()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Account not found")
         raise HTTPException(status_code=400, detail="Insufficient funds")
     
-    account.balance -= withdrawal.amount
-    
-    # Create transaction record
+    # Create transaction record and update the monthly rollup in the same DB
+    # transaction as the balance change
+    created_at = datetime.utcnow()
     transaction = models.Transaction(
         account_id=account_id,
         transaction_type="withdrawal",
         amount=withdrawal.amount,
-        description=withdrawal.description
+        description=withdrawal.description,
+        created_at=created_at
     )
     db.add(transaction)
-    db.commit()
-    db.refresh(account)
+    statements.record_posting(db, account_id, "withdrawal", withdrawal.amount, new_balance, created_at)
+    
+    result = {"message": f"Successfully withdrew ${withdrawal.amount}", "new_balance": new_balance}
+    result = idempotency.commit(db, idempotency_key, scope, body_hash, result, response)
+    entity_cache.invalidate(("account", account_id))
+    return result
+
+@app.get("/checking-accounts/{account_id}/statements", response_model=List[schemas.AccountStatement])
+def get_account_statements(
+    account_id: int,
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    db: Session = Depends(get_db),
+):
+    account = db.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).first()
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
     
-    return {"message": f"Successfully withdrew ${withdrawal.amount}", "new_balance": account.balance}
+    if month is not None:
+        return [statements.get_statement(db, account_id, month)]
+    return (
+        db.query(models.AccountStatement)
+        .filter(models.AccountStatement.account_id == account_id)
+        .order_by(models.AccountStatement.month.desc())
+        .all()
+    )
+
+def filter_transactions(query, account_id: int, start: Optional[datetime], end: Optional[datetime], transaction_type: Optional[str]):
+    # account_id plus a created_at range is served by ix_transactions_account_id_created_at
+    query = query.filter(models.Transaction.account_id == account_id)
+    if start is not None:
+        query = query.filter(models.Transaction.created_at >= start)
+    if end is not None:
+        query = query.filter(models.Transaction.created_at < end)
+    if transaction_type is not None:
+        query = query.filter(models.Transaction.transaction_type == transaction_type)
+    return query
 
 @app.get("/checking-accounts/{account_id}/transactions", response_model=List[schemas.Transaction])
-def get_account_transactions(account_id: int, db: Session = Depends(get_db)):
+def get_account_transactions(
+    account_id: int,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    transaction_type: Optional[str] = Query(None, pattern="^(deposit|withdrawal)$"),
+    db: Session = Depends(get_db),
+):
     account = db.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    return db.query(models.Transaction).filter(models.Transaction.account_id == account_id).all()
+    query = filter_transactions(db.query(models.Transaction), account_id, start, end, transaction_type)
+    rows = query.order_by(models.Transaction.created_at.desc(), models.Transaction.id.desc()).all()
+    return fast_response(rows, schemas.Transaction)
+
+# Transaction history export streams rows in batches so memory stays flat
+# regardless of how long the account history is
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = list(schemas.Transaction.model_fields)
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def stream_transactions(rows, export_format: str):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(EXPORT_FIELDS)
+
+    for count, row in enumerate(rows, start=1):
+        if export_format == "csv":
+            writer.writerow([
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in (getattr(row, field) for field in EXPORT_FIELDS)
+            ])
+        else:
+            buffer.write(schemas.Transaction.model_validate(row).model_dump_json())
+            buffer.write("\n")
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@app.get("/checking-accounts/{account_id}/transactions/export")
+@sync_session_only
+def export_account_transactions(
+    account_id: int,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    transaction_type: Optional[str] = Query(None, pattern="^(deposit|withdrawal)$"),
+    db: Session = Depends(get_db),
+):
+    account = db.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).first()
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    # Plain column rows skip the identity map; yield_per fetches them in batches
+    columns = [getattr(models.Transaction, field) for field in EXPORT_FIELDS]
+    rows = (
+        filter_transactions(db.query(*columns), account_id, start, end, transaction_type)
+        .order_by(models.Transaction.created_at, models.Transaction.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+    return StreamingResponse(
+        stream_transactions(rows, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="account-{account_id}-transactions.{export_format}"'},
+    )
+
+# Ledger endpoints
+@app.post("/ledger/batch", response_model=schemas.LedgerBatchResponse)
+def post_ledger_batch(batch: schemas.LedgerBatchRequest, db: Session = Depends(get_db)):
+    account_ids = {posting.account_id for posting in batch.postings}
+    table = models.CheckingAccount.__table__
+    if db.bind.dialect.name == "sqlite":
+        # SQLite ignores FOR UPDATE and reads outside a transaction; a no-op
+        # write takes the database write lock first instead
+        db.execute(update(table).where(table.c.id.in_(account_ids)).values(balance=table.c.balance))
+    # Lock the touched rows (FOR UPDATE on PostgreSQL) so the snapshot below stays valid
+    balances = dict(
+        db.query(models.CheckingAccount.id, models.CheckingAccount.balance)
+        .filter(models.CheckingAccount.id.in_(account_ids))
+        .with_for_update()
+        .all()
+    )
+
+    # Validate postings in order against running balances, so a withdrawal can
+    # spend a deposit that appears earlier in the same batch
+    deltas = {}
+    totals = {}
+    transactions = []
+    results = []
+    created_at = datetime.utcnow()
+    for index, posting in enumerate(batch.postings):
+        result = schemas.LedgerPostingResult(index=index, account_id=posting.account_id, status="rejected")
+        signed_amount = posting.amount if posting.transaction_type == "deposit" else -posting.amount
+        if posting.amount <= 0:
+            result.detail = "Amount must be positive"
+        elif posting.account_id not in balances:
+            result.detail = "Account not found"
+        elif balances[posting.account_id] + signed_amount < 0:
+            result.detail = "Insufficient funds"
+        else:
+            balances[posting.account_id] += signed_amount
+            deltas[posting.account_id] = deltas.get(posting.account_id, Decimal("0")) + signed_amount
+            account_totals = totals.setdefault(posting.account_id, {
+                "deposit_total": Decimal("0"), "deposit_count": 0,
+                "withdrawal_total": Decimal("0"), "withdrawal_count": 0,
+            })
+            account_totals[f"{posting.transaction_type}_total"] += posting.amount
+            account_totals[f"{posting.transaction_type}_count"] += 1
+            transactions.append({
+                "account_id": posting.account_id,
+                "transaction_type": posting.transaction_type,
+                "amount": posting.amount,
+                "description": posting.description or posting.transaction_type.capitalize(),
+                "created_at": created_at,
+            })
+            result.status = "applied"
+            result.new_balance = balances[posting.account_id]
+        results.append(result)
+
+    if deltas:
+        # One executemany UPDATE applies the net change per account
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.balance + bindparam("b_delta") >= 0)
+            .values(balance=func.round(table.c.balance + bindparam("b_delta"), 2))
+        )
+        updated = db.execute(stmt, [{"b_id": account_id, "b_delta": delta} for account_id, delta in deltas.items()])
+        if db.bind.dialect.supports_sane_multi_rowcount and updated.rowcount != len(deltas):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Account balances changed during the batch, please retry")
+        db.execute(insert(models.Transaction), transactions)
+        month = statements.month_of(created_at)
+        for account_id, delta in deltas.items():
+            statements.add_to_statement(db, account_id, month, balances[account_id], delta, **totals[account_id])
+    db.commit()
+    for account_id in deltas:
+        entity_cache.invalidate(("account", account_id))
+
+    applied = len(transactions)
+    return {"applied": applied, "rejected": len(results) - applied, "results": results}
 
 # Credit Card endpoints
 @app.post("/credit-cards/", response_model=schemas.CreditCard)
@@ -138,37 +463,74 @@ def create_credit_card(card: schemas.CreditCardCreate, db: Session = Depends(get
         db.add(db_card)
         db.commit()
         db.refresh(db_card)
+        entity_cache.invalidate(("credit_card", db_card.id))
         return db_card
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Credit card number already exists")
 
 @app.get("/credit-cards/", response_model=List[schemas.CreditCard])
-def get_credit_cards(db: Session = Depends(get_db)):
-    return db.query(models.CreditCard).all()
+def get_credit_cards(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    rows = paginate(db.query(models.CreditCard), models.CreditCard, after_id, limit, response)
+    return fast_response(rows, schemas.CreditCard, response)
 
 @app.get("/credit-cards/{card_id}", response_model=schemas.CreditCard)
-def get_credit_card(card_id: int, db: Session = Depends(get_db)):
-    card = db.query(models.CreditCard).filter(models.CreditCard.id == card_id).first()
-    if not card:
+def get_credit_card(card_id: int, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    response = cached_entity_response(
+        ("credit_card", card_id),
+        lambda: db.query(models.CreditCard).filter(models.CreditCard.id == card_id).first(),
+        schemas.CreditCard,
+        if_none_match,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Credit card not found")
-    return card
+    return response
 
-@app.get("/customers/{customer_id}/accounts")
-def get_customer_accounts(customer_id: int, db: Session = Depends(get_db)):
-    customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
-    
-    checking_accounts = db.query(models.CheckingAccount).filter(models.CheckingAccount.customer_id == customer_id).all()
-    credit_cards = db.query(models.CreditCard).filter(models.CreditCard.customer_id == customer_id).all()
-    
+# Portfolio endpoints
+MAX_PORTFOLIO_BATCH_SIZE = 100
+
+def load_portfolios(db: Session, customer_ids: List[int]):
+    # selectinload fetches the accounts and cards of every customer in one IN query each
+    customers = (
+        db.query(models.Customer)
+        .options(selectinload(models.Customer.checking_accounts), selectinload(models.Customer.credit_cards))
+        .filter(models.Customer.id.in_(customer_ids))
+        .all()
+    )
     return {
-        "customer": customer,
-        "checking_accounts": checking_accounts,
-        "credit_cards": credit_cards
+        customer.id: {
+            "customer": customer,
+            "checking_accounts": customer.checking_accounts,
+            "credit_cards": customer.credit_cards,
+        }
+        for customer in customers
     }
 
+@app.get("/customers/{customer_id}/accounts", response_model=schemas.CustomerPortfolio)
+def get_customer_accounts(customer_id: int, db: Session = Depends(get_db)):
+    portfolio = load_portfolios(db, [customer_id]).get(customer_id)
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return portfolio
+
+@app.get("/portfolios/", response_model=List[schemas.CustomerPortfolio])
+def get_customer_portfolios(
+    customer_ids: List[int] = Query([]),
+    db: Session = Depends(get_db),
+):
+    if not customer_ids:
+        raise HTTPException(status_code=400, detail="At least one customer id is required")
+    if len(customer_ids) > MAX_PORTFOLIO_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PORTFOLIO_BATCH_SIZE} customer ids per request")
+    # Unknown ids are skipped; the rest keep the order they were requested in
+    portfolios = load_portfolios(db, customer_ids)
+    return [portfolios[customer_id] for customer_id in dict.fromkeys(customer_ids) if customer_id in portfolios]
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Bank Service API! Visit /docs for Swagger documentation"}
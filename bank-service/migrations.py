@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations
+
+Usage:
+    python migrations.py upgrade [--to VERSION]
+    python migrations.py current
+
+Schema changes run once per deploy through "upgrade", never at import or
+app startup. Each applied migration is recorded in the schema_migrations
+table. At startup the app only reads the highest recorded version and
+refuses to start if it is behind LATEST_VERSION (set DB_SCHEMA_CHECK=off to
+skip the check). A newer schema is accepted, so migrations can be applied
+ahead of a rolling deploy as long as they stay backward compatible.
+
+Migrations must be safe to run against a database that the baseline
+create_all already brought up to date, i.e. check before they alter.
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+
+import models
+
+SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "on").lower() not in ("0", "off", "false", "no")
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+def _baseline(conn):
+    # Also adopts databases created by the old import-time create_all
+    models.Base.metadata.create_all(bind=conn)
+
+def _index_transactions_account_id_created_at(conn):
+    # create_all skips tables that already exist, indexes included
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_transactions_account_id_created_at ON transactions (account_id, created_at)"
+    ))
+
+def _add_idempotency_request_hash(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("idempotency_keys")}
+    if "request_hash" not in columns:
+        conn.execute(text("ALTER TABLE idempotency_keys ADD COLUMN request_hash VARCHAR"))
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", _baseline),
+    Migration(2, "index transactions (account_id, created_at)", _index_transactions_account_id_created_at),
+    Migration(3, "idempotency_keys.request_hash", _add_idempotency_request_hash),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+def upgrade(engine, target: Optional[int] = None) -> list:
+    """Apply pending migrations up to target (default: all); returns the versions applied."""
+    target = LATEST_VERSION if target is None else target
+    with engine.begin() as conn:
+        migration_metadata.create_all(bind=conn)
+        version = current_version(conn)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if version < migration.version <= target:
+            # One transaction per migration, recorded together with its changes
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version, description=migration.description))
+            applied.append(migration.version)
+    return applied
+
+def check_schema(engine):
+    """Fail fast if the database is missing migrations this code needs."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version} but this code needs {LATEST_VERSION}; "
+            "run `python migrations.py upgrade`"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the database schema version")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subcommands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, dest="target", help="stop at this version")
+    subcommands.add_parser("current", help="print the applied and latest versions")
+    args = parser.parse_args(argv)
+
+    from database import engine
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.target)
+        print(json.dumps({"applied": applied}))
+    else:
+        with engine.connect() as conn:
+            print(json.dumps({"current": current_version(conn), "latest": LATEST_VERSION}))
+
+if __name__ == "__main__":
+    main()
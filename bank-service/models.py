@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -46,6 +46,12 @@ class CreditCard(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Serves per-account history lookups filtered and ordered by time.
+        # create_all only builds it for new tables; migration 2 adds it to
+        # existing databases
+        Index("ix_transactions_account_id_created_at", "account_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("checking_accounts.id"))
@@ -54,4 +60,33 @@ class Transaction(Base):
     description = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    account = relationship("CheckingAccount", back_populates="transactions")
\ No newline at end of file
+    account = relationship("CheckingAccount", back_populates="transactions")
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, unique=True, nullable=False)
+    scope = Column(String, nullable=False)  # request path the key was first used with
+    request_hash = Column(String)  # SHA-256 of the request body; NULL for keys stored before it was recorded
+    response_body = Column(Text, nullable=False)  # JSON of the first successful response
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# Monthly rollup of an account's ledger, updated in the same DB transaction as every posting
+class AccountStatement(Base):
+    __tablename__ = "account_statements"
+    __table_args__ = (
+        # Also serves "latest statement before a month" lookups
+        UniqueConstraint("account_id", "month", name="uq_account_statements_account_month"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("checking_accounts.id"), nullable=False)
+    month = Column(String, nullable=False)  # "YYYY-MM"
+    opening_balance = Column(Numeric(precision=10, scale=2), nullable=False)
+    closing_balance = Column(Numeric(precision=10, scale=2), nullable=False)
+    deposit_total = Column(Numeric(precision=10, scale=2), default=Decimal("0.00"))
+    withdrawal_total = Column(Numeric(precision=10, scale=2), default=Decimal("0.00"))
+    deposit_count = Column(Integer, default=0)
+    withdrawal_count = Column(Integer, default=0)
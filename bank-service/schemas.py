@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -51,6 +51,11 @@ class CreditCard(CreditCardBase):
     class Config:
         from_attributes = True
 
+class CustomerPortfolio(BaseModel):
+    customer: Customer
+    checking_accounts: List[CheckingAccount]
+    credit_cards: List[CreditCard]
+
 class TransactionBase(BaseModel):
     amount: Decimal
     description: Optional[str] = None
@@ -67,10 +72,46 @@ class Transaction(TransactionBase):
     class Config:
         from_attributes = True
 
+class AccountStatement(BaseModel):
+    account_id: int
+    month: str
+    opening_balance: Decimal
+    closing_balance: Decimal
+    deposit_total: Decimal
+    withdrawal_total: Decimal
+    deposit_count: int
+    withdrawal_count: int
+    
+    class Config:
+        from_attributes = True
+
 class DepositRequest(BaseModel):
     amount: Decimal
     description: Optional[str] = "Deposit"
 
 class WithdrawalRequest(BaseModel):
     amount: Decimal
-    description: Optional[str] = "Withdrawal"
\ No newline at end of file
+    description: Optional[str] = "Withdrawal"
+
+MAX_LEDGER_BATCH_SIZE = 5000
+
+class LedgerPosting(BaseModel):
+    account_id: int
+    transaction_type: Literal["deposit", "withdrawal"]
+    amount: Decimal
+    description: Optional[str] = None
+
+class LedgerBatchRequest(BaseModel):
+    postings: List[LedgerPosting] = Field(..., min_length=1, max_length=MAX_LEDGER_BATCH_SIZE)
+
+class LedgerPostingResult(BaseModel):
+    index: int
+    account_id: int
+    status: str  # "applied" or "rejected"
+    detail: Optional[str] = None
+    new_balance: Optional[Decimal] = None
+
+class LedgerBatchResponse(BaseModel):
+    applied: int
+    rejected: int
+    results: List[LedgerPostingResult]
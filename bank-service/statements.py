@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Monthly statement rollups
+
+Every posting folds itself into its account's account_statements row for the
+month, in the same DB transaction, so reading a statement is a single indexed
+lookup instead of a scan of the account history.
+
+Usage:
+    python statements.py rebuild [--account-id ID ...]
+
+rebuild recomputes the rollups from the transactions table, e.g. to backfill
+history recorded before rollups existed.
+"""
+import argparse
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+import models
+import migrations
+from database import SessionLocal, engine
+
+REBUILD_BATCH_SIZE = 5000
+ZERO = Decimal("0.00")
+
+def month_of(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m")
+
+def add_to_statement(
+    db: Session,
+    account_id: int,
+    month: str,
+    closing_balance: Decimal,
+    net_change: Decimal,
+    deposit_total: Decimal = ZERO,
+    deposit_count: int = 0,
+    withdrawal_total: Decimal = ZERO,
+    withdrawal_count: int = 0,
+):
+    """Fold postings into the month's rollup; the caller commits.
+
+    Callers must already hold the account row lock (the balance UPDATE takes
+    it), which keeps closing balances ordered between concurrent postings.
+    """
+    statement = models.AccountStatement
+    updated = db.execute(
+        update(statement)
+        .where(statement.account_id == account_id, statement.month == month)
+        .values(
+            closing_balance=closing_balance,
+            deposit_total=func.round(statement.deposit_total + deposit_total, 2),
+            deposit_count=statement.deposit_count + deposit_count,
+            withdrawal_total=func.round(statement.withdrawal_total + withdrawal_total, 2),
+            withdrawal_count=statement.withdrawal_count + withdrawal_count,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    if updated.rowcount == 0:
+        # First posting of the month opens its statement
+        db.execute(insert(statement).values(
+            account_id=account_id,
+            month=month,
+            opening_balance=closing_balance - net_change,
+            closing_balance=closing_balance,
+            deposit_total=deposit_total,
+            deposit_count=deposit_count,
+            withdrawal_total=withdrawal_total,
+            withdrawal_count=withdrawal_count,
+        ))
+
+def record_posting(db: Session, account_id: int, transaction_type: str, amount: Decimal, new_balance: Decimal, created_at: datetime):
+    if transaction_type == "deposit":
+        add_to_statement(db, account_id, month_of(created_at), new_balance, amount, deposit_total=amount, deposit_count=1)
+    else:
+        add_to_statement(db, account_id, month_of(created_at), new_balance, -amount, withdrawal_total=amount, withdrawal_count=1)
+
+def get_statement(db: Session, account_id: int, month: str) -> dict:
+    """Return the month's statement, carrying the balance forward over quiet months."""
+    statement = (
+        db.query(models.AccountStatement)
+        .filter(models.AccountStatement.account_id == account_id, models.AccountStatement.month == month)
+        .first()
+    )
+    if statement:
+        return statement
+
+    previous = (
+        db.query(models.AccountStatement.closing_balance)
+        .filter(models.AccountStatement.account_id == account_id, models.AccountStatement.month < month)
+        .order_by(models.AccountStatement.month.desc())
+        .first()
+    )
+    balance = previous.closing_balance if previous else ZERO
+    return {
+        "account_id": account_id,
+        "month": month,
+        "opening_balance": balance,
+        "closing_balance": balance,
+        "deposit_total": ZERO,
+        "withdrawal_total": ZERO,
+        "deposit_count": 0,
+        "withdrawal_count": 0,
+    }
+
+def rebuild_statements(db: Session, account_ids: Optional[list] = None) -> int:
+    """Recompute rollups from the transactions table and return how many were written.
+
+    Accounts start at a zero balance and only change through transactions,
+    so replaying each account's history in order reproduces its balances.
+    """
+    delete = db.query(models.AccountStatement)
+    rows = db.query(
+        models.Transaction.account_id,
+        models.Transaction.transaction_type,
+        models.Transaction.amount,
+        models.Transaction.created_at,
+    )
+    if account_ids:
+        delete = delete.filter(models.AccountStatement.account_id.in_(account_ids))
+        rows = rows.filter(models.Transaction.account_id.in_(account_ids))
+    delete.delete(synchronize_session=False)
+
+    rows = rows.order_by(
+        models.Transaction.account_id, models.Transaction.created_at, models.Transaction.id
+    ).yield_per(REBUILD_BATCH_SIZE)
+
+    pending = []
+    written = 0
+    current = None
+    balance = ZERO
+    for row in rows:
+        month = month_of(row.created_at)
+        if current is None or current["account_id"] != row.account_id or current["month"] != month:
+            if current is None or current["account_id"] != row.account_id:
+                balance = ZERO
+            current = {
+                "account_id": row.account_id,
+                "month": month,
+                "opening_balance": balance,
+                "closing_balance": balance,
+                "deposit_total": ZERO,
+                "withdrawal_total": ZERO,
+                "deposit_count": 0,
+                "withdrawal_count": 0,
+            }
+            pending.append(current)
+        if row.transaction_type == "deposit":
+            balance += row.amount
+            current["deposit_total"] += row.amount
+            current["deposit_count"] += 1
+        else:
+            balance -= row.amount
+            current["withdrawal_total"] += row.amount
+            current["withdrawal_count"] += 1
+        current["closing_balance"] = balance
+
+        # Keep the open statement pending; flush the finished ones in bulk
+        if len(pending) > REBUILD_BATCH_SIZE:
+            db.execute(insert(models.AccountStatement), pending[:-1])
+            written += len(pending) - 1
+            pending = pending[-1:]
+
+    if pending:
+        db.execute(insert(models.AccountStatement), pending)
+        written += len(pending)
+    db.commit()
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain monthly statement rollups")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild = subcommands.add_parser("rebuild", help="recompute rollups from transaction history")
+    rebuild.add_argument("--account-id", type=int, action="append", dest="account_ids")
+    args = parser.parse_args(argv)
+
+    migrations.upgrade(engine)
+    db = SessionLocal()
+    try:
+        written = rebuild_statements(db, args.account_ids)
+    finally:
+        db.close()
+    print(json.dumps({"statements": written}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Async drivers used when DB_ASYNC is enabled for each backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+class StorageConfig:
+    """Database engine settings, read from environment variables.
+
+    DATABASE_URL            SQLAlchemy URL; SQLite file or PostgreSQL
+    DB_ASYNC                serve requests from an AsyncSession (default off)
+    DB_POOL_SIZE            pooled connections kept open (default 5)
+    DB_MAX_OVERFLOW         extra connections allowed under load (default 10)
+    DB_POOL_TIMEOUT         seconds to wait for a pooled connection (default 30)
+    DB_POOL_RECYCLE         seconds before a connection is replaced (default 1800)
+    DB_POOL_PRE_PING        test connections on checkout (default off)
+    SQLITE_JOURNAL_MODE     journal mode pragma (default WAL)
+    SQLITE_SYNCHRONOUS      synchronous pragma (default NORMAL, safe with WAL)
+    SQLITE_BUSY_TIMEOUT_MS  how long a writer waits for the lock (default 5000)
+    SQLITE_CACHE_SIZE_KB    page cache per connection (default 65536)
+    SQLITE_MMAP_SIZE        bytes of the file to memory-map (default 268435456)
+    """
+
+    def __init__(self, default_url: str):
+        self.database_url = os.getenv("DATABASE_URL", default_url)
+        self.use_async = _env_bool("DB_ASYNC")
+
+        self.pool_size = _env_int("DB_POOL_SIZE", 5)
+        self.max_overflow = _env_int("DB_MAX_OVERFLOW", 10)
+        self.pool_timeout = _env_int("DB_POOL_TIMEOUT", 30)
+        self.pool_recycle = _env_int("DB_POOL_RECYCLE", 1800)
+        self.pool_pre_ping = _env_bool("DB_POOL_PRE_PING")
+
+        self.sqlite_journal_mode = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+        self.sqlite_synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+        self.sqlite_busy_timeout_ms = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+        self.sqlite_cache_size_kb = _env_int("SQLITE_CACHE_SIZE_KB", 65536)
+        self.sqlite_mmap_size = _env_int("SQLITE_MMAP_SIZE", 268435456)
+
+    @property
+    def backend(self) -> str:
+        return make_url(self.database_url).get_backend_name()
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.backend == "sqlite"
+
+    @property
+    def async_database_url(self) -> str:
+        url = make_url(self.database_url)
+        return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(hide_password=False)
+
+    def engine_kwargs(self) -> dict:
+        kwargs = {}
+        if self.is_sqlite:
+            kwargs["connect_args"] = {"check_same_thread": False}
+            # In-memory databases use a single shared connection, not a queue pool
+            if make_url(self.database_url).database in (None, "", ":memory:"):
+                return kwargs
+        kwargs.update(
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping,
+        )
+        return kwargs
+
+    def sqlite_pragmas(self) -> dict:
+        return {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "busy_timeout": self.sqlite_busy_timeout_ms,
+            # A negative cache_size is measured in KiB rather than pages
+            "cache_size": -self.sqlite_cache_size_kb,
+            "mmap_size": self.sqlite_mmap_size,
+            "temp_store": "MEMORY",
+        }
+
+    def install_pragmas(self, engine):
+        """Apply the SQLite pragmas to every new DBAPI connection of engine."""
+        pragmas = self.sqlite_pragmas()
+
+        @event.listens_for(engine, "connect")
+        def set_storage_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    def create_engine(self):
+        engine = create_engine(self.database_url, **self.engine_kwargs())
+        if self.is_sqlite:
+            self.install_pragmas(engine)
+        return engine
+
+    def create_async_engine(self):
+        kwargs = self.engine_kwargs()
+        if "pool_size" in kwargs:
+            # aiosqlite defaults to NullPool; keep connections pooled as in sync mode
+            kwargs["poolclass"] = AsyncAdaptedQueuePool
+        engine = create_async_engine(self.async_database_url, **kwargs)
+        if self.is_sqlite:
+            self.install_pragmas(engine.sync_engine)
+        return engine
@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import main
+from database import AsyncSessionRoute, get_async_db
+from models import Base
+
+@pytest.fixture
+def async_client(tmp_path):
+    # Rebuild the app's routes with the async-mode route class
+    app = FastAPI()
+    app.router.route_class = AsyncSessionRoute
+    for route in main.app.routes:
+        if isinstance(route, APIRoute):
+            app.add_api_route(route.path, route.endpoint, methods=list(route.methods), response_model=route.response_model)
+
+    db_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    AsyncTestingSessionLocal = async_sessionmaker(autoflush=False, bind=async_engine)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as c:
+        yield c
+
+def test_async_mode_wraps_session_routes():
+    route = AsyncSessionRoute("/customers/{customer_id}", main.get_customer, response_model=None)
+    assert route.dependant.dependencies[0].call is get_async_db
+
+    route = AsyncSessionRoute("/checking-accounts/{account_id}/transactions/export", main.export_account_transactions)
+    assert route.endpoint is main.export_account_transactions
+
+def test_async_mode_end_to_end(async_client, sample_customer_data, sample_account_data, sample_credit_card_data):
+    customer_response = async_client.post("/customers/", json=sample_customer_data)
+    assert customer_response.status_code == 200
+    customer_id = customer_response.json()["id"]
+
+    account_response = async_client.post("/checking-accounts/", json={**sample_account_data, "customer_id": customer_id})
+    assert account_response.status_code == 200
+    account_id = account_response.json()["id"]
+    async_client.post("/credit-cards/", json={**sample_credit_card_data, "customer_id": customer_id})
+
+    response = async_client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 80.00})
+    assert response.status_code == 200
+    assert float(response.json()["new_balance"]) == 80.00
+
+    response = async_client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 100.00})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient funds"
+
+    response = async_client.get(f"/customers/{customer_id}/accounts")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["checking_accounts"][0]["balance"] == "80.00"
+    assert len(data["credit_cards"]) == 1
+
+    response = async_client.get("/customers/?limit=1")
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [customer_id]
+
+    response = async_client.get("/customers/999")
+    assert response.status_code == 404
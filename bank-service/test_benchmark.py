@@ -0,0 +1,57 @@
+import random
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, select
+
+import models
+from benchmark import build_operations, percentile, seed_database, summarize
+
+def test_seeded_balances_match_transaction_history(tmp_path):
+    url = f"sqlite:///{tmp_path / 'bench.db'}"
+    account_ids = seed_database(url, customers=3, accounts_per_customer=2, transactions_per_account=5, seed=1)
+    assert account_ids == [1, 2, 3, 4, 5, 6]
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        for account in conn.execute(select(models.CheckingAccount)):
+            rows = conn.execute(
+                select(models.Transaction.transaction_type, models.Transaction.amount)
+                .where(models.Transaction.account_id == account.id)
+            ).all()
+            net = sum(amount if kind == "deposit" else -amount for kind, amount in rows)
+            assert account.balance == Decimal(net).quantize(Decimal("0.01"))
+            assert account.balance >= 0
+        assert conn.execute(select(func.count()).select_from(models.AccountStatement)).scalar() > 0
+    engine.dispose()
+
+def test_seeding_is_deterministic(tmp_path):
+    balances = []
+    for name in ("a.db", "b.db"):
+        url = f"sqlite:///{tmp_path / name}"
+        seed_database(url, customers=2, accounts_per_customer=1, transactions_per_account=5, seed=7)
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            balances.append(conn.execute(select(models.CheckingAccount.balance).order_by(models.CheckingAccount.id)).scalars().all())
+        engine.dispose()
+    assert balances[0] == balances[1]
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.50) == 0.050
+    assert percentile(values, 0.99) == 0.099
+    summary = summarize(values, errors=2, elapsed=2.0)
+    assert summary["rps"] == 50.0
+    assert summary["errors"] == 2
+    assert summary["latency_ms"]["p95"] == 95.0
+
+def test_contention_workload_only_touches_hot_accounts():
+    operations = build_operations("contention", list(range(1, 101)), customers=50, hot_accounts=3)
+    rng = random.Random(0)
+    paths = {factory(rng)[1] for _, _, factory in operations for _ in range(50)}
+    assert {path.split("/")[2] for path in paths} <= {"1", "2", "3"}
+
+def test_history_workload_only_sends_supported_parameters():
+    operations = build_operations("history", list(range(1, 11)), customers=10, hot_accounts=3)
+    rng = random.Random(0)
+    paths = [factory(rng)[1] for _, _, factory in operations]
+    assert all("?" not in path for path in paths)
@@ -0,0 +1,96 @@
+import io
+import json
+import pytest
+
+import models
+from import_data import UnreadableRow, read_rows, run_import, _insert_chunk
+
+def test_import_customers_reports_duplicate_emails(db_session):
+    db_session.add(models.Customer(first_name="Existing", last_name="User", email="taken@example.com"))
+    db_session.commit()
+
+    rows = [
+        (1, {"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"}),
+        (2, {"first_name": "Bob", "last_name": "Ray", "email": "taken@example.com"}),
+        (3, {"first_name": "Cat", "last_name": "Poe", "email": "ann@example.com"}),
+        (4, {"first_name": "Dan", "last_name": "Moe", "email": "not-an-email"}),
+        (5, {"first_name": "Eve", "last_name": "Kay", "email": "eve@example.com"}),
+    ]
+    report = io.StringIO()
+    summary = run_import(db_session, "customers", rows, chunk_size=2, report=report)
+
+    assert summary == {"inserted": 2, "conflicts": 3}
+    conflicts = [json.loads(line) for line in report.getvalue().splitlines()]
+    assert sorted(c["line"] for c in conflicts) == [2, 3, 4]
+    assert db_session.query(models.Customer).count() == 3
+
+def test_import_accounts_reports_conflicts(db_session):
+    customer = models.Customer(first_name="Ann", last_name="Lee", email="ann@example.com")
+    db_session.add(customer)
+    db_session.commit()
+
+    rows = [
+        (1, {"account_number": "IMP0001", "customer_id": customer.id}),
+        (2, {"account_number": "IMP0002", "customer_id": 999}),
+        (3, {"account_number": "IMP0001", "customer_id": customer.id}),
+        (4, {"account_number": "IMP0003", "customer_id": customer.id}),
+    ]
+    report = io.StringIO()
+    summary = run_import(db_session, "accounts", rows, report=report)
+
+    assert summary == {"inserted": 2, "conflicts": 2}
+    details = {c["line"]: c["detail"] for c in map(json.loads, report.getvalue().splitlines())}
+    assert details == {2: "Customer not found", 3: "Account number already exists"}
+    accounts = db_session.query(models.CheckingAccount).order_by(models.CheckingAccount.id).all()
+    assert [a.account_number for a in accounts] == ["IMP0001", "IMP0003"]
+    assert all(a.created_at is not None for a in accounts)
+
+def test_insert_chunk_falls_back_to_per_row_on_conflict(db_session):
+    db_session.add(models.Customer(first_name="Existing", last_name="User", email="race@example.com"))
+    db_session.commit()
+
+    conflicts = _insert_chunk(db_session, models.Customer.__table__, [
+        (1, {"first_name": "A", "last_name": "B", "email": "a@example.com"}),
+        (2, {"first_name": "C", "last_name": "D", "email": "race@example.com"}),
+    ])
+    db_session.commit()
+
+    assert [c["line"] for c in conflicts] == [2]
+    assert db_session.query(models.Customer).count() == 2
+
+def test_read_rows_csv_and_ndjson(tmp_path):
+    csv_path = tmp_path / "customers.csv"
+    csv_path.write_text("first_name,last_name,email\nAnn,Lee,ann@example.com\n")
+    ndjson_path = tmp_path / "customers.ndjson"
+    ndjson_path.write_text('{"first_name": "Bob", "last_name": "Ray", "email": "bob@example.com"}\n\n')
+
+    assert list(read_rows(str(csv_path))) == [(2, {"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"})]
+    assert list(read_rows(str(ndjson_path))) == [(1, {"first_name": "Bob", "last_name": "Ray", "email": "bob@example.com"})]
+
+def test_unreadable_ndjson_lines_are_reported_not_fatal(db_session, tmp_path):
+    path = tmp_path / "customers.ndjson"
+    path.write_text(
+        '{"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"}\n'
+        '{"first_name": "Bob", \n'
+        '["not", "an", "object"]\n'
+        '{"first_name": "Cat", "last_name": "Poe", "email": "cat@example.com"}\n'
+    )
+    assert list(read_rows(str(path)))[1] == (2, UnreadableRow("Invalid JSON: Expecting property name enclosed in double quotes"))
+
+    report = io.StringIO()
+    summary = run_import(db_session, "customers", read_rows(str(path)), chunk_size=1, report=report)
+
+    assert summary == {"inserted": 2, "conflicts": 2}
+    details = {c["line"]: c["detail"] for c in map(json.loads, report.getvalue().splitlines())}
+    assert details[2].startswith("Invalid JSON")
+    assert details[3] == "Invalid row: expected an object"
+
+def test_csv_rows_with_extra_columns_are_reported(db_session, tmp_path):
+    path = tmp_path / "customers.csv"
+    path.write_text("first_name,last_name,email\nAnn,Lee,ann@example.com\nBob,Ray,bob@example.com,extra\n")
+
+    report = io.StringIO()
+    summary = run_import(db_session, "customers", read_rows(str(path)), report=report)
+
+    assert summary == {"inserted": 1, "conflicts": 1}
+    assert json.loads(report.getvalue()) == {"line": 3, "detail": "Invalid row: more values than header columns"}
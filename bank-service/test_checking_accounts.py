@@ -95,4 +95,45 @@ def test_get_customer_accounts(client: TestClient, sample_customer_data, sample_
 def test_get_customer_accounts_not_found(client: TestClient):
     response = client.get("/customers/999/accounts")
     assert response.status_code == 404
-    assert response.json()["detail"] == "Customer not found"
\ No newline at end of file
+    assert response.json()["detail"] == "Customer not found"
+
+def test_get_customer_accounts_typed_portfolio(client: TestClient, sample_customer_data, sample_account_data, sample_credit_card_data):
+    customer_response = client.post("/customers/", json=sample_customer_data)
+    customer_id = customer_response.json()["id"]
+    client.post("/checking-accounts/", json={**sample_account_data, "customer_id": customer_id})
+    client.post("/credit-cards/", json={**sample_credit_card_data, "customer_id": customer_id})
+
+    response = client.get(f"/customers/{customer_id}/accounts")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["customer"] == customer_response.json()
+    assert data["checking_accounts"][0]["balance"] == "0.00"
+    assert data["credit_cards"][0]["credit_limit"] == "5000.00"
+    assert "customer" not in data["checking_accounts"][0]
+
+def test_get_customer_portfolios_batch(client: TestClient, sample_account_data):
+    customer_ids = []
+    for i in range(3):
+        response = client.post("/customers/", json={
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"portfolio{i}@example.com"
+        })
+        customer_ids.append(response.json()["id"])
+    client.post("/checking-accounts/", json={**sample_account_data, "customer_id": customer_ids[2]})
+
+    response = client.get(f"/portfolios/?customer_ids={customer_ids[2]}&customer_ids=999&customer_ids={customer_ids[0]}")
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["customer"]["id"] for p in data] == [customer_ids[2], customer_ids[0]]
+    assert len(data[0]["checking_accounts"]) == 1
+    assert data[1]["checking_accounts"] == []
+
+def test_get_customer_portfolios_requires_ids(client: TestClient):
+    response = client.get("/portfolios/")
+    assert response.status_code == 400
+
+def test_get_customer_portfolios_caps_batch_size(client: TestClient):
+    query = "&".join(f"customer_ids={i}" for i in range(1, 102))
+    response = client.get(f"/portfolios/?{query}")
+    assert response.status_code == 400
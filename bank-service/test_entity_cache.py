@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import models
+from cache import ReadThroughCache, etag_matches
+
+def create_customer_and_account(client: TestClient, sample_customer_data, sample_account_data):
+    customer_response = client.post("/customers/", json=sample_customer_data)
+    customer_id = customer_response.json()["id"]
+
+    account_data = {**sample_account_data, "customer_id": customer_id}
+    account_response = client.post("/checking-accounts/", json=account_data)
+    return customer_id, account_response.json()["id"]
+
+def test_get_customer_returns_etag_and_304(client: TestClient, sample_customer_data):
+    customer = client.post("/customers/", json=sample_customer_data).json()
+
+    response = client.get(f"/customers/{customer['id']}")
+    assert response.status_code == 200
+    assert response.json() == customer
+    etag = response.headers["ETag"]
+    assert etag.startswith('"')
+
+    response = client.get(f"/customers/{customer['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = client.get(f"/customers/{customer['id']}", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+def test_deposit_invalidates_cached_account(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    before = client.get(f"/checking-accounts/{account_id}")
+    assert before.json()["balance"] == "0.00"
+
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 25.00})
+    after = client.get(f"/checking-accounts/{account_id}", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.json()["balance"] == "25.00"
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+    client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 5.00})
+    assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "20.00"
+
+def test_ledger_batch_invalidates_cached_accounts(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    client.get(f"/checking-accounts/{account_id}")
+
+    client.post("/ledger/batch", json={"postings": [
+        {"account_id": account_id, "transaction_type": "deposit", "amount": 12.00},
+    ]})
+    assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "12.00"
+
+def test_get_credit_card_cached(client: TestClient, sample_customer_data, sample_credit_card_data):
+    customer_id = client.post("/customers/", json=sample_customer_data).json()["id"]
+    card = client.post("/credit-cards/", json={**sample_credit_card_data, "customer_id": customer_id}).json()
+
+    first = client.get(f"/credit-cards/{card['id']}")
+    second = client.get(f"/credit-cards/{card['id']}", headers={"If-None-Match": f'W/{first.headers["ETag"]}'})
+    assert first.json() == card
+    assert second.status_code == 304
+
+def test_read_through_cache_skips_load_racing_invalidation():
+    cache = ReadThroughCache(maxsize=10, ttl=60)
+
+    def stale_load():
+        # A writer commits and invalidates while this read is in flight
+        cache.invalidate("key")
+        return "stale"
+
+    assert cache.get_or_load("key", stale_load) == "stale"
+    assert cache.get_or_load("key", lambda: "fresh") == "fresh"
+    assert cache.get_or_load("key", lambda: "unused") == "fresh"
+
+def test_entity_cache_is_off_by_default_with_several_workers():
+    assert main.entity_cache_ttl({}) == 5.0
+    assert main.entity_cache_ttl({"WEB_CONCURRENCY": "1"}) == 5.0
+    assert main.entity_cache_ttl({"WEB_CONCURRENCY": "4"}) == 0.0
+    assert main.entity_cache_ttl({"WEB_CONCURRENCY": "4", "ENTITY_CACHE_TTL_SECONDS": "2"}) == 2.0
+
+def test_disabled_cache_serves_writes_made_by_other_workers(client: TestClient, db_session, sample_customer_data,
+                                                           sample_account_data, monkeypatch):
+    monkeypatch.setattr(main, "entity_cache", ReadThroughCache(maxsize=10, ttl=0))
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    before = client.get(f"/checking-accounts/{account_id}")
+
+    # A deposit handled by another worker never invalidates this process
+    db_session.query(models.CheckingAccount).filter(models.CheckingAccount.id == account_id).update({"balance": 42})
+    db_session.commit()
+
+    after = client.get(f"/checking-accounts/{account_id}", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.json()["balance"] == "42.00"
+
+def test_etag_matches():
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
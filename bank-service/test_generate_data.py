@@ -0,0 +1,83 @@
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, create_mock_engine, inspect, select
+from sqlalchemy.orm import Session
+
+import models
+import statements
+from generate_data import generate, reset_id_sequences
+
+@pytest.fixture
+def generated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        counts = generate(conn, customers=50, accounts_per_customer=2, card_rate=0.5, transactions=3000,
+                          seed=3, start=datetime(2024, 1, 1), days=90, batch_size=500)
+    yield engine, counts
+    engine.dispose()
+
+def test_row_counts_and_indexes(generated):
+    engine, counts = generated
+    assert counts["customers"] == 50
+    assert counts["checking_accounts"] == 100
+    assert counts["transactions"] == 3000
+    assert 0 < counts["credit_cards"] < 50
+    index_names = {index["name"] for index in inspect(engine).get_indexes("transactions")}
+    assert "ix_transactions_account_id_created_at" in index_names
+
+def test_balances_and_statements_match_the_ledger(generated):
+    engine, _ = generated
+    with Session(engine) as db:
+        for account in db.query(models.CheckingAccount):
+            net = sum(
+                (t.amount if t.transaction_type == "deposit" else -t.amount)
+                for t in db.query(models.Transaction).filter(models.Transaction.account_id == account.id)
+            )
+            assert account.balance == Decimal(net).quantize(Decimal("0.01"))
+            assert account.balance >= 0
+
+        def rollups():
+            return [
+                (s.account_id, s.month, s.opening_balance, s.closing_balance, s.deposit_total, s.deposit_count,
+                 s.withdrawal_total, s.withdrawal_count)
+                for s in db.query(models.AccountStatement).order_by(models.AccountStatement.account_id, models.AccountStatement.month)
+            ]
+
+        generated_rollups = rollups()
+        statements.rebuild_statements(db)
+        assert generated_rollups == rollups()
+
+def test_activity_is_skewed_towards_a_few_accounts(generated):
+    engine, _ = generated
+    with engine.connect() as conn:
+        per_account = Counter(conn.execute(select(models.Transaction.account_id)).scalars())
+    busiest = sum(count for _, count in per_account.most_common(20))
+    # The busiest 20% of accounts carry well over 20% of the volume
+    assert busiest > 0.4 * 3000
+
+def test_same_seed_same_data(tmp_path):
+    ledgers = []
+    for name in ("a.db", "b.db"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        models.Base.metadata.create_all(bind=engine)
+        with engine.connect() as conn:
+            generate(conn, customers=5, accounts_per_customer=1, card_rate=1.0, transactions=100,
+                     seed=11, start=datetime(2024, 1, 1), days=60)
+            ledgers.append(conn.execute(select(models.Transaction.account_id, models.Transaction.amount,
+                                               models.Transaction.created_at).order_by(models.Transaction.id)).all())
+        engine.dispose()
+    assert ledgers[0] == ledgers[1]
+
+def test_id_sequences_are_reset_on_postgresql():
+    executed = []
+    engine = create_mock_engine("postgresql://", lambda sql, *args, **kwargs: executed.append(str(sql.compile(dialect=engine.dialect))))
+    reset_id_sequences(engine, [models.Customer.__table__, models.CheckingAccount.__table__])
+
+    assert len(executed) == 2
+    assert "setval(pg_get_serial_sequence(%(pg_get_serial_sequence_1)s, %(pg_get_serial_sequence_2)s)" in executed[0]
+    assert "max(customers.id)" in executed[0]
+    assert "max(checking_accounts.id)" in executed[1]
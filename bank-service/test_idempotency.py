@@ -0,0 +1,117 @@
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+
+import cache as cache_module
+import idempotency
+import models
+from cache import TTLCache
+
+def create_customer_and_account(client: TestClient, sample_customer_data, sample_account_data):
+    customer_response = client.post("/customers/", json=sample_customer_data)
+    customer_id = customer_response.json()["id"]
+
+    account_data = {**sample_account_data, "customer_id": customer_id}
+    account_response = client.post("/checking-accounts/", json=account_data)
+    return customer_id, account_response.json()["id"]
+
+def test_deposit_retry_is_not_posted_twice(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    headers = {"Idempotency-Key": "deposit-1"}
+    first = client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 100.00}, headers=headers)
+    retry = client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 100.00}, headers=headers)
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "100.00"
+    assert len(client.get(f"/checking-accounts/{account_id}/transactions").json()) == 1
+
+def test_replay_from_database_after_cache_eviction(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 80.00})
+
+    headers = {"Idempotency-Key": "withdraw-1"}
+    first = client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 30.00}, headers=headers)
+    idempotency.response_cache.clear()
+    retry = client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 30.00}, headers=headers)
+
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "50.00"
+
+def test_failed_request_does_not_consume_key(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    headers = {"Idempotency-Key": "withdraw-2"}
+    response = client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 10.00}, headers=headers)
+    assert response.status_code == 400
+
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 10.00})
+    response = client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 10.00}, headers=headers)
+    assert response.status_code == 200
+    assert float(response.json()["new_balance"]) == 0.0
+
+def test_key_reused_for_different_request(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    headers = {"Idempotency-Key": "shared-key"}
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 10.00}, headers=headers)
+    response = client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 10.00}, headers=headers)
+
+    assert response.status_code == 422
+    assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "10.00"
+
+def test_key_reused_with_a_different_body(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    headers = {"Idempotency-Key": "deposit-amount"}
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 10.00}, headers=headers)
+    response = client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 500.00}, headers=headers)
+    assert response.status_code == 422
+    assert "Idempotent-Replayed" not in response.headers
+
+    # Also enforced when the replay comes from the database, and the same
+    # amount written differently is still the same request
+    idempotency.response_cache.clear()
+    assert client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 500.00}, headers=headers).status_code == 422
+    response = client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": "10"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "10.00"
+
+def test_purge_expired_keys(db_session):
+    old = datetime.utcnow() - timedelta(seconds=idempotency.KEY_RETENTION_SECONDS + 60)
+    db_session.add(models.IdempotencyKey(key="old", scope="/x", response_body="{}", created_at=old))
+    db_session.add(models.IdempotencyKey(key="new", scope="/x", response_body="{}"))
+    db_session.commit()
+
+    assert idempotency.purge_expired(db_session) == 1
+    assert [k.key for k in db_session.query(models.IdempotencyKey).all()] == ["new"]
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
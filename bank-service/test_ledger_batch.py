@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+
+def create_accounts(client: TestClient, sample_customer_data, count: int):
+    customer_response = client.post("/customers/", json=sample_customer_data)
+    customer_id = customer_response.json()["id"]
+
+    account_ids = []
+    for i in range(count):
+        response = client.post("/checking-accounts/", json={
+            "account_number": f"LEDGER{i:06d}",
+            "customer_id": customer_id
+        })
+        account_ids.append(response.json()["id"])
+    return account_ids
+
+def test_ledger_batch_applies_postings(client: TestClient, sample_customer_data):
+    first, second = create_accounts(client, sample_customer_data, 2)
+
+    response = client.post("/ledger/batch", json={"postings": [
+        {"account_id": first, "transaction_type": "deposit", "amount": 100.00, "description": "Payroll"},
+        {"account_id": second, "transaction_type": "deposit", "amount": 50.00},
+        {"account_id": first, "transaction_type": "withdrawal", "amount": 30.00},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["applied"] == 3
+    assert data["rejected"] == 0
+    assert [r["status"] for r in data["results"]] == ["applied"] * 3
+    assert data["results"][2]["new_balance"] == "70.00"
+
+    assert client.get(f"/checking-accounts/{first}").json()["balance"] == "70.00"
+    assert client.get(f"/checking-accounts/{second}").json()["balance"] == "50.00"
+
+    transactions = client.get(f"/checking-accounts/{first}/transactions").json()
+    assert len(transactions) == 2
+    assert {t["description"] for t in transactions} == {"Payroll", "Withdrawal"}
+
+def test_ledger_batch_reports_partial_failures(client: TestClient, sample_customer_data):
+    account_id, = create_accounts(client, sample_customer_data, 1)
+
+    response = client.post("/ledger/batch", json={"postings": [
+        {"account_id": account_id, "transaction_type": "withdrawal", "amount": 10.00},
+        {"account_id": account_id, "transaction_type": "deposit", "amount": 25.00},
+        {"account_id": 999, "transaction_type": "deposit", "amount": 5.00},
+        {"account_id": account_id, "transaction_type": "deposit", "amount": -5.00},
+        {"account_id": account_id, "transaction_type": "withdrawal", "amount": 20.00},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["applied"] == 2
+    assert data["rejected"] == 3
+    assert [r["status"] for r in data["results"]] == ["rejected", "applied", "rejected", "rejected", "applied"]
+    assert data["results"][0]["detail"] == "Insufficient funds"
+    assert data["results"][2]["detail"] == "Account not found"
+    assert data["results"][3]["detail"] == "Amount must be positive"
+
+    assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "5.00"
+    assert len(client.get(f"/checking-accounts/{account_id}/transactions").json()) == 2
+
+def test_ledger_batch_rejects_unknown_type(client: TestClient, sample_customer_data):
+    account_id, = create_accounts(client, sample_customer_data, 1)
+
+    response = client.post("/ledger/batch", json={"postings": [
+        {"account_id": account_id, "transaction_type": "transfer", "amount": 10.00},
+    ]})
+    assert response.status_code == 422
+
+def test_ledger_batch_rejects_empty_batch(client: TestClient):
+    response = client.post("/ledger/batch", json={"postings": []})
+    assert response.status_code == 422
+
+def test_ledger_batch_many_postings(client: TestClient, sample_customer_data):
+    account_ids = create_accounts(client, sample_customer_data, 3)
+
+    postings = [
+        {"account_id": account_ids[i % 3], "transaction_type": "deposit", "amount": 1.25}
+        for i in range(300)
+    ]
+    response = client.post("/ledger/batch", json={"postings": postings})
+    assert response.status_code == 200
+    assert response.json()["applied"] == 300
+
+    for account_id in account_ids:
+        assert client.get(f"/checking-accounts/{account_id}").json()["balance"] == "125.00"
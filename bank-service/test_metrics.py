@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import metrics
+
+def test_metrics_endpoint_exposes_prometheus_text(client: TestClient):
+    client.get("/customers/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_requests_total{method="GET",route="/customers/",status="200"}' in response.text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/customers/",le="+Inf"}' in response.text
+    assert "http_requests_in_flight" in response.text
+
+def test_requests_are_labelled_by_route_template(client: TestClient, sample_customer_data):
+    customer_id = client.post("/customers/", json=sample_customer_data).json()["id"]
+    before = metrics.REQUESTS.value("GET", "/customers/{customer_id}", "200")
+    missing_before = metrics.REQUESTS.value("GET", "/customers/{customer_id}", "404")
+
+    client.get(f"/customers/{customer_id}")
+    client.get("/customers/99999")
+
+    assert metrics.REQUESTS.value("GET", "/customers/{customer_id}", "200") == before + 1
+    assert metrics.REQUESTS.value("GET", "/customers/{customer_id}", "404") == missing_before + 1
+
+def test_unknown_paths_share_one_label(client: TestClient):
+    before = metrics.REQUESTS.value("GET", metrics.UNMATCHED_ROUTE, "404")
+    client.get("/no-such-path/1")
+    client.get("/no-such-path/2")
+    assert metrics.REQUESTS.value("GET", metrics.UNMATCHED_ROUTE, "404") == before + 2
+
+def test_sql_statements_are_attributed_to_the_request(client: TestClient, sample_customer_data):
+    client.post("/customers/", json=sample_customer_data)
+    count = metrics.REQUEST_SQL_STATEMENTS.count("GET", "/customers/")
+    statements = metrics.REQUEST_SQL_STATEMENTS.sum("GET", "/customers/")
+
+    client.get("/customers/")
+
+    assert metrics.REQUEST_SQL_STATEMENTS.count("GET", "/customers/") == count + 1
+    assert metrics.REQUEST_SQL_STATEMENTS.sum("GET", "/customers/") >= statements + 1
+    assert metrics.POOL_CHECKOUT_WAIT.count() > 0
+    assert metrics.IN_FLIGHT.value() == 0
+
+def test_pool_checkouts_are_timed_after_dispose():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    engine.dispose()
+
+    count = metrics.POOL_CHECKOUT_WAIT.count()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    engine.dispose()
+
+    assert metrics.POOL_CHECKOUT_WAIT.count() == count + 1
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/a")
+
+    lines = list(histogram.render())
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+    assert histogram.sum("/a") == pytest.approx(5.55)
@@ -0,0 +1,65 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import migrations
+from models import Base
+
+@pytest.fixture
+def fresh_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+def test_upgrade_creates_schema_and_records_version(fresh_engine):
+    assert migrations.upgrade(fresh_engine) == [m.version for m in migrations.MIGRATIONS]
+
+    tables = set(inspect(fresh_engine).get_table_names())
+    assert {"customers", "checking_accounts", "transactions", "schema_migrations"} <= tables
+    with fresh_engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.LATEST_VERSION
+    migrations.check_schema(fresh_engine)
+
+def test_upgrade_is_a_no_op_when_current(fresh_engine):
+    migrations.upgrade(fresh_engine)
+    assert migrations.upgrade(fresh_engine) == []
+
+def test_upgrade_adopts_database_created_before_migrations(fresh_engine):
+    Base.metadata.create_all(bind=fresh_engine)
+    with fresh_engine.begin() as conn:
+        conn.execute(text("INSERT INTO customers (first_name, last_name, email) VALUES ('A', 'B', 'a@example.com')"))
+
+    migrations.upgrade(fresh_engine)
+
+    with fresh_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM customers")).scalar() == 1
+        assert migrations.current_version(conn) == migrations.LATEST_VERSION
+
+def test_upgrade_indexes_transactions_of_a_database_created_before_migrations(fresh_engine):
+    Base.metadata.create_all(bind=fresh_engine)
+    with fresh_engine.begin() as conn:
+        # Databases created before the composite index was added to the model lack it
+        conn.execute(text("DROP INDEX ix_transactions_account_id_created_at"))
+
+    migrations.upgrade(fresh_engine)
+
+    indexes = {index["name"] for index in inspect(fresh_engine).get_indexes("transactions")}
+    assert "ix_transactions_account_id_created_at" in indexes
+
+def test_check_schema_rejects_an_unmigrated_database(fresh_engine):
+    with pytest.raises(migrations.SchemaVersionError, match="migrations.py upgrade"):
+        migrations.check_schema(fresh_engine)
+
+def test_importing_the_app_issues_no_ddl(tmp_path):
+    db_path = tmp_path / "untouched.db"
+    subprocess.run(
+        [sys.executable, "-c", "import main"],
+        check=True, env={"DATABASE_URL": f"sqlite:///{db_path}", "PATH": ""},
+        cwd=Path(__file__).parent,
+    )
+    engine = create_engine(f"sqlite:///{db_path}")
+    assert inspect(engine).get_table_names() == []
+    engine.dispose()
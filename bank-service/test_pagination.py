@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+
+def create_customers(client: TestClient, count: int):
+    ids = []
+    for i in range(count):
+        response = client.post("/customers/", json={
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"customer{i}@example.com"
+        })
+        ids.append(response.json()["id"])
+    return ids
+
+def test_get_customers_first_page(client: TestClient):
+    ids = create_customers(client, 5)
+
+    response = client.get("/customers/?limit=2")
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["id"] for c in data] == ids[:2]
+    assert response.headers["X-Next-Cursor"] == str(ids[1])
+
+def test_get_customers_walk_all_pages(client: TestClient):
+    ids = create_customers(client, 5)
+
+    seen = []
+    after_id = None
+    while True:
+        url = "/customers/?limit=2"
+        if after_id is not None:
+            url += f"&after_id={after_id}"
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(c["id"] for c in response.json())
+        after_id = response.headers.get("X-Next-Cursor")
+        if after_id is None:
+            break
+
+    assert seen == ids
+
+def test_get_customers_last_page_has_no_cursor(client: TestClient):
+    create_customers(client, 2)
+
+    response = client.get("/customers/?limit=2")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
+
+def test_get_customers_limit_is_capped(client: TestClient):
+    response = client.get("/customers/?limit=100000")
+    assert response.status_code == 422
+
+def test_get_checking_accounts_after_id(client: TestClient):
+    customer_id = create_customers(client, 1)[0]
+    account_ids = []
+    for i in range(3):
+        response = client.post("/checking-accounts/", json={
+            "account_number": f"ACC{i:09d}",
+            "customer_id": customer_id
+        })
+        account_ids.append(response.json()["id"])
+
+    response = client.get(f"/checking-accounts/?after_id={account_ids[0]}")
+    assert response.status_code == 200
+    assert [a["id"] for a in response.json()] == account_ids[1:]
+
+def test_get_credit_cards_paginated(client: TestClient):
+    customer_id = create_customers(client, 1)[0]
+    for i in range(3):
+        client.post("/credit-cards/", json={
+            "card_number": f"411111111111{i:04d}",
+            "credit_limit": 1000.00,
+            "customer_id": customer_id
+        })
+
+    response = client.get("/credit-cards/?limit=2")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/credit-cards/?limit=2&after_id={next_cursor}")
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
@@ -0,0 +1,56 @@
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from profiling import ProfilingMiddleware, SamplingProfiler
+
+def test_request_with_token_writes_profile(client: TestClient, tmp_path):
+    profiled = TestClient(ProfilingMiddleware(app, token="secret", directory=str(tmp_path), interval_ms=1))
+
+    response = profiled.get("/customers/", headers={"X-Profile": "secret"})
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert os.path.exists(tmp_path / response.headers["X-Profile-File"])
+    assert int(response.headers["X-Profile-Samples"]) >= 0
+    assert "X-Profile-Top" in response.headers
+
+def test_request_without_valid_token_is_not_profiled(client: TestClient, tmp_path):
+    profiled = TestClient(ProfilingMiddleware(app, token="secret", directory=str(tmp_path)))
+
+    assert "X-Profile-File" not in profiled.get("/customers/").headers
+    assert "X-Profile-File" not in profiled.get("/customers/", headers={"X-Profile": "wrong"}).headers
+    assert not os.listdir(tmp_path)
+
+def test_profiling_is_disabled_without_a_token(client: TestClient, tmp_path):
+    profiled = TestClient(ProfilingMiddleware(app, token="", directory=str(tmp_path)))
+    assert "X-Profile-File" not in profiled.get("/customers/", headers={"X-Profile": ""}).headers
+
+def test_requests_over_the_concurrency_limit_are_skipped(client: TestClient, tmp_path):
+    profiled = TestClient(ProfilingMiddleware(app, token="secret", directory=str(tmp_path), max_concurrent=1))
+    profiled.app._slots.acquire()
+
+    response = profiled.get("/customers/", headers={"X-Profile": "secret"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Profile"] == "skipped"
+    assert not os.listdir(tmp_path)
+
+def test_sampling_profiler_records_busy_threads(tmp_path):
+    def spin():
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            pass
+
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    spin()
+    profiler.stop()
+
+    assert profiler.samples > 0
+    assert any(label.startswith("spin ") for label, _ in profiler.top_functions())
+    profiler.write_collapsed(str(tmp_path / "out.collapsed"))
+    line = (tmp_path / "out.collapsed").read_text().splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
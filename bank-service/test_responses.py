@@ -0,0 +1,55 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from fastapi.testclient import TestClient
+
+import responses
+import schemas
+from responses import FastJSONResponse, fast_response
+
+def test_list_fast_path_matches_validated_wire_format(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id = client.post("/customers/", json=sample_customer_data).json()["id"]
+    account = client.post("/checking-accounts/", json={**sample_account_data, "customer_id": customer_id}).json()
+    client.post(f"/checking-accounts/{account['id']}/deposit", json={"amount": 100.00})
+
+    listed = client.get("/checking-accounts/").json()[0]
+    single = client.get(f"/checking-accounts/{account['id']}").json()
+    portfolio = client.get(f"/customers/{customer_id}/accounts").json()["checking_accounts"][0]
+    assert listed == single == portfolio
+    assert listed["balance"] == "100.00"
+
+def test_fast_json_response_encodes_decimal_and_datetime():
+    body = FastJSONResponse({"amount": Decimal("100.00"), "at": datetime(2024, 1, 2, 3, 4, 5, 600)}).body
+    assert body == b'{"amount":"100.00","at":"2024-01-02T03:04:05.000600"}'
+
+def test_fast_json_response_without_orjson(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    body = FastJSONResponse({"amount": Decimal("5.50"), "at": datetime(2024, 1, 2)}).body
+    assert body == b'{"amount":"5.50","at":"2024-01-02T00:00:00"}'
+
+class Row:
+    id = 1
+    account_id = 2
+    transaction_type = "deposit"
+    amount = Decimal("12.30")
+    description = None
+    created_at = datetime(2024, 5, 6, 7, 8, 9)
+    internal = "not in schema"
+
+def test_fast_response_copies_only_schema_fields():
+    response = fast_response([Row()], schemas.Transaction)
+    assert response.body == (
+        b'[{"amount":"12.30","description":null,"id":1,"account_id":2,'
+        b'"transaction_type":"deposit","created_at":"2024-05-06T07:08:09"}]'
+    )
+
+def test_fast_response_can_validate(monkeypatch):
+    unvalidated = fast_response([Row()], schemas.Transaction).body
+    monkeypatch.setattr(responses, "VALIDATE_RESPONSES", True)
+    assert fast_response([Row()], schemas.Transaction).body == unvalidated
+
+    class BadRow(Row):
+        amount = "not a number"
+
+    with pytest.raises(ValueError):
+        fast_response([BadRow()], schemas.Transaction)
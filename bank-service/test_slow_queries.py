@@ -0,0 +1,34 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from conftest import engine
+from slow_queries import SlowQueryLog
+
+def test_slow_query_log_includes_parameters_and_plan(client: TestClient, sample_customer_data, caplog):
+    customer_id = client.post("/customers/", json=sample_customer_data).json()["id"]
+    log = SlowQueryLog(threshold_ms=0)
+    log.install(engine)
+    try:
+        with caplog.at_level(logging.WARNING, logger="slow_queries"):
+            client.get(f"/customers/{customer_id}/accounts")
+    finally:
+        log.remove(engine)
+
+    messages = [r.getMessage() for r in caplog.records]
+    customer_lookup = next(m for m in messages if "FROM customers" in m)
+    assert "route=GET /customers/{customer_id}/accounts" in customer_lookup
+    assert f"parameters=({customer_id}," in customer_lookup
+    assert "SEARCH customers USING INTEGER PRIMARY KEY" in customer_lookup
+    assert ("customers", "GET /customers/{customer_id}/accounts") not in log.scans
+
+def test_full_scans_are_detected_in_plans():
+    assert SlowQueryLog.full_scans(["SCAN songs"]) == ["songs"]
+    assert SlowQueryLog.full_scans(["SCAN TABLE songs"]) == ["songs"]
+    assert SlowQueryLog.full_scans(["->  Seq Scan on songs  (cost=0.00..1.01 rows=1 width=4)"]) == ["songs"]
+    assert SlowQueryLog.full_scans(["SCAN songs USING COVERING INDEX ix_songs_playlist_id"]) == ["songs"]
+    assert SlowQueryLog.full_scans(["SEARCH songs USING INDEX ix_songs_playlist_id (playlist_id=?)"]) == []
+    assert SlowQueryLog.full_scans(["SCAN CONSTANT ROW"]) == []
+    assert SlowQueryLog.full_scans(["SCAN songs_fts VIRTUAL TABLE INDEX 32:M3"]) == []
+    assert SlowQueryLog.full_scans(["SCAN songs_fts VIRTUAL TABLE INDEX 0:"]) == ["songs_fts"]
+    assert SlowQueryLog.full_scans(["MATERIALIZE hits", "SCAN hits", "SCAN songs"]) == ["songs"]
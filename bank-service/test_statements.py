@@ -0,0 +1,106 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from fastapi.testclient import TestClient
+
+import models
+from statements import rebuild_statements
+
+def create_customer_and_account(client: TestClient, sample_customer_data, sample_account_data):
+    customer_response = client.post("/customers/", json=sample_customer_data)
+    customer_id = customer_response.json()["id"]
+
+    account_data = {**sample_account_data, "customer_id": customer_id}
+    account_response = client.post("/checking-accounts/", json=account_data)
+    return customer_id, account_response.json()["id"]
+
+def test_statement_tracks_postings(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 200.00})
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 50.50})
+    client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 75.25})
+    client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 1000.00})  # rejected
+
+    month = datetime.utcnow().strftime("%Y-%m")
+    response = client.get(f"/checking-accounts/{account_id}/statements?month={month}")
+    assert response.status_code == 200
+    statement, = response.json()
+    assert statement["month"] == month
+    assert statement["opening_balance"] == "0.00"
+    assert statement["closing_balance"] == "175.25"
+    assert statement["deposit_total"] == "250.50"
+    assert statement["deposit_count"] == 2
+    assert statement["withdrawal_total"] == "75.25"
+    assert statement["withdrawal_count"] == 1
+
+def test_statement_for_quiet_month_carries_balance(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 40.00})
+
+    response = client.get(f"/checking-accounts/{account_id}/statements?month=9999-12")
+    statement, = response.json()
+    assert statement["opening_balance"] == "40.00"
+    assert statement["closing_balance"] == "40.00"
+    assert statement["deposit_count"] == 0
+
+    response = client.get(f"/checking-accounts/{account_id}/statements?month=2000-01")
+    assert response.json()[0]["opening_balance"] == "0.00"
+
+def test_statements_list_and_validation(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    assert client.get(f"/checking-accounts/{account_id}/statements").json() == []
+
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 10.00})
+    assert len(client.get(f"/checking-accounts/{account_id}/statements").json()) == 1
+
+    assert client.get(f"/checking-accounts/{account_id}/statements?month=2024-13").status_code == 422
+    assert client.get("/checking-accounts/999/statements").status_code == 404
+
+def test_ledger_batch_updates_statement(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 100.00})
+
+    client.post("/ledger/batch", json={"postings": [
+        {"account_id": account_id, "transaction_type": "deposit", "amount": 25.00},
+        {"account_id": account_id, "transaction_type": "withdrawal", "amount": 60.00},
+        {"account_id": account_id, "transaction_type": "withdrawal", "amount": 500.00},
+    ]})
+
+    month = datetime.utcnow().strftime("%Y-%m")
+    statement, = client.get(f"/checking-accounts/{account_id}/statements?month={month}").json()
+    assert statement["opening_balance"] == "0.00"
+    assert statement["closing_balance"] == "65.00"
+    assert statement["deposit_total"] == "125.00"
+    assert statement["deposit_count"] == 2
+    assert statement["withdrawal_total"] == "60.00"
+    assert statement["withdrawal_count"] == 1
+
+def test_rebuild_statements_from_history(client: TestClient, db_session, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    for created_at, transaction_type, amount in [
+        (datetime(2024, 1, 15), "deposit", "500.00"),
+        (datetime(2024, 1, 20), "withdrawal", "120.00"),
+        (datetime(2024, 3, 1), "deposit", "20.00"),
+    ]:
+        db_session.add(models.Transaction(
+            account_id=account_id, transaction_type=transaction_type,
+            amount=Decimal(amount), created_at=created_at,
+        ))
+    db_session.commit()
+
+    assert rebuild_statements(db_session) == 2
+
+    statements = client.get(f"/checking-accounts/{account_id}/statements").json()
+    assert [s["month"] for s in statements] == ["2024-03", "2024-01"]
+    assert statements[1]["closing_balance"] == "380.00"
+    assert statements[1]["withdrawal_count"] == 1
+    assert statements[0]["opening_balance"] == "380.00"
+    assert statements[0]["closing_balance"] == "400.00"
+
+    february, = client.get(f"/checking-accounts/{account_id}/statements?month=2024-02").json()
+    assert february["opening_balance"] == "380.00"
+
+    # Rebuilding again replaces rather than duplicates the rollups
+    assert rebuild_statements(db_session, [account_id]) == 2
+    assert len(client.get(f"/checking-accounts/{account_id}/statements").json()) == 2
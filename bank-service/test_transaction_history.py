@@ -1,6 +1,12 @@
+import csv
+import json
 import pytest
+from datetime import datetime
+from decimal import Decimal
 from fastapi.testclient import TestClient
 
+import models
+
 def create_customer_and_account(client: TestClient, sample_customer_data, sample_account_data):
     """Helper function to create customer and account for testing"""
     customer_response = client.post("/customers/", json=sample_customer_data)
@@ -127,4 +133,104 @@ def test_transaction_timestamps_chronological(client: TestClient, sample_custome
     for transaction in data:
         assert "created_at" in transaction
         # Basic ISO format check
-        assert "T" in transaction["created_at"]
\ No newline at end of file
+        assert "T" in transaction["created_at"]
+
+def test_export_account_transactions_ndjson(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 100.00, "description": "First deposit"})
+    client.post(f"/checking-accounts/{account_id}/withdraw", json={"amount": 40.00, "description": "First withdrawal"})
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["transaction_type"] for line in lines] == ["deposit", "withdrawal"]
+    assert lines[0]["amount"] == "100.00"
+    assert lines[1]["description"] == "First withdrawal"
+    assert lines[0] == client.get(f"/checking-accounts/{account_id}/transactions").json()[-1]
+
+def test_export_account_transactions_csv(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    for i in range(3):
+        client.post(f"/checking-accounts/{account_id}/deposit", json={"amount": 10.00, "description": f"Deposit {i}"})
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions/export?format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert len(rows) == 3
+    assert [row["description"] for row in rows] == ["Deposit 0", "Deposit 1", "Deposit 2"]
+    assert rows[0]["amount"] == "10.00"
+    assert rows[0]["account_id"] == str(account_id)
+
+def test_export_account_transactions_invalid_format(client: TestClient, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions/export?format=xml")
+    assert response.status_code == 422
+
+def test_export_account_transactions_account_not_found(client: TestClient):
+    response = client.get("/checking-accounts/999/transactions/export")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Account not found"
+
+def add_dated_transactions(db_session, account_id):
+    for created_at, transaction_type, amount in [
+        (datetime(2024, 1, 15), "deposit", "500.00"),
+        (datetime(2024, 2, 1), "withdrawal", "20.00"),
+        (datetime(2024, 2, 10), "deposit", "75.00"),
+        (datetime(2024, 3, 5), "withdrawal", "10.00"),
+    ]:
+        db_session.add(models.Transaction(
+            account_id=account_id,
+            transaction_type=transaction_type,
+            amount=Decimal(amount),
+            description=f"{transaction_type} {created_at:%Y-%m-%d}",
+            created_at=created_at,
+        ))
+    db_session.commit()
+
+def test_get_account_transactions_newest_first(client: TestClient, db_session, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    add_dated_transactions(db_session, account_id)
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions")
+    assert response.status_code == 200
+    dates = [t["created_at"][:10] for t in response.json()]
+    assert dates == ["2024-03-05", "2024-02-10", "2024-02-01", "2024-01-15"]
+
+def test_get_account_transactions_date_range(client: TestClient, db_session, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    add_dated_transactions(db_session, account_id)
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions?from=2024-02-01T00:00:00&to=2024-03-01T00:00:00")
+    assert response.status_code == 200
+    dates = [t["created_at"][:10] for t in response.json()]
+    assert dates == ["2024-02-10", "2024-02-01"]
+
+def test_get_account_transactions_type_filter(client: TestClient, db_session, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    add_dated_transactions(db_session, account_id)
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions?transaction_type=withdrawal&from=2024-02-05T00:00:00")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["amount"] == "10.00"
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions?transaction_type=transfer")
+    assert response.status_code == 422
+
+def test_export_account_transactions_date_range(client: TestClient, db_session, sample_customer_data, sample_account_data):
+    customer_id, account_id = create_customer_and_account(client, sample_customer_data, sample_account_data)
+    add_dated_transactions(db_session, account_id)
+
+    response = client.get(f"/checking-accounts/{account_id}/transactions/export?format=csv&from=2024-02-01T00:00:00")
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert len(lines) == 4
+    assert "2024-02-01" in lines[1]
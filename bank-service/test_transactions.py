@@ -1,5 +1,15 @@
+import threading
 import pytest
+from datetime import datetime
+from decimal import Decimal
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import models
+import schemas
+import statements
+from main import adjust_balance, post_ledger_batch
 
 def create_customer_and_account(client: TestClient, sample_customer_data, sample_account_data):
     """Helper function to create customer and account for testing"""
@@ -113,4 +123,80 @@ def test_multiple_transactions_balance_accuracy(client: TestClient, sample_custo
             expected_balance -= amount
         
         assert response.status_code == 200
-        assert float(response.json()["new_balance"]) == expected_balance
\ No newline at end of file
+        assert float(response.json()["new_balance"]) == expected_balance
+
+def test_concurrent_withdrawals_never_overdraw(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/race.db", connect_args={"check_same_thread": False, "timeout": 30})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        customer = models.Customer(first_name="Race", last_name="Test", email="race@example.com")
+        db.add(customer)
+        db.flush()
+        account = models.CheckingAccount(account_number="RACE0001", customer_id=customer.id, balance=Decimal("100.00"))
+        db.add(account)
+        db.commit()
+        account_id = account.id
+
+    results = []
+    def withdraw():
+        with Session() as db:
+            new_balance = adjust_balance(db, account_id, Decimal("-30.00"))
+            db.commit()
+            results.append(new_balance)
+
+    threads = [threading.Thread(target=withdraw) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len([r for r in results if r is not None]) == 3
+    with Session() as db:
+        assert db.get(models.CheckingAccount, account_id).balance == Decimal("10.00")
+    engine.dispose()
+
+def test_ledger_batch_balances_survive_a_concurrent_deposit(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/ledger-race.db", connect_args={"check_same_thread": False, "timeout": 30})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        customer = models.Customer(first_name="Race", last_name="Test", email="race@example.com")
+        db.add(customer)
+        db.flush()
+        account = models.CheckingAccount(account_number="RACE0001", customer_id=customer.id, balance=Decimal("100.00"))
+        db.add(account)
+        db.commit()
+        account_id = account.id
+
+    def deposit():
+        with Session() as db:
+            created_at = datetime.utcnow()
+            new_balance = adjust_balance(db, account_id, Decimal("50.00"))
+            statements.record_posting(db, account_id, "deposit", Decimal("50.00"), new_balance, created_at)
+            db.commit()
+
+    # Run a deposit right after the batch has read the balances; it must
+    # either commit first or wait for the batch to commit
+    depositor = threading.Thread(target=deposit)
+    batch_thread = threading.get_ident()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def deposit_after_balance_read(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == batch_thread and depositor.ident is None \
+                and statement.startswith("SELECT checking_accounts.id AS checking_accounts_id, checking_accounts.balance"):
+            depositor.start()
+            depositor.join(timeout=0.5)
+
+    batch = schemas.LedgerBatchRequest(postings=[{"account_id": account_id, "transaction_type": "deposit", "amount": "10.00"}])
+    with Session() as db:
+        reported = post_ledger_batch(batch, db)["results"][0].new_balance
+    depositor.join()
+
+    with Session() as db:
+        balance = db.get(models.CheckingAccount, account_id).balance
+        closing_balance = db.query(models.AccountStatement.closing_balance).filter_by(account_id=account_id).scalar()
+    assert balance == Decimal("160.00")
+    assert reported in (Decimal("110.00"), balance)
+    assert closing_balance == balance
+    engine.dispose()
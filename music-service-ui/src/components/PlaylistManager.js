@@ -175,7 +175,7 @@ const PlaylistManager = ({ onPlaylistSelect, refreshTrigger, onPlaylistUpdate })
                     <p className="text-sm text-gray-400 mt-1">{playlist.description}</p>
                   )}
                   <p className="text-xs text-gray-400 mt-2">
-                    {playlist.songs?.length || 0} songs
+                    {playlist.song_count ?? 0} songs
                   </p>
                 </div>
                 <div className="flex space-x-2" onClick={(e) => e.stopPropagation()}>
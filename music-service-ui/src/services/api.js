@@ -28,7 +28,7 @@ const handleResponse = async (response) => {
   return response.json();
 };
 
-const apiRequest = async (endpoint, options = {}) => {
+const sendRequest = async (endpoint, options = {}) => {
   const url = `${API_BASE_URL}${endpoint}`;
   const config = {
     headers: {
@@ -40,7 +40,7 @@ const apiRequest = async (endpoint, options = {}) => {
 
   try {
     const response = await fetch(url, config);
-    return await handleResponse(response);
+    return { data: await handleResponse(response), headers: response.headers };
   } catch (error) {
     if (error instanceof ApiError) {
       throw error;
@@ -49,6 +49,30 @@ const apiRequest = async (endpoint, options = {}) => {
   }
 };
 
+const apiRequest = async (endpoint, options = {}) => {
+  const { data } = await sendRequest(endpoint, options);
+  return data;
+};
+
+// List endpoints return one page at a time; a full page carries the next
+// cursor in the X-Next-Cursor header, passed back as ?after_id=
+const PAGE_SIZE = 500;
+
+const apiRequestAllPages = async (endpoint) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (cursor !== null) {
+      params.set('after_id', cursor);
+    }
+    const { data, headers } = await sendRequest(`${endpoint}?${params}`);
+    items.push(...data);
+    cursor = headers.get('X-Next-Cursor');
+  } while (cursor !== null);
+  return items;
+};
+
 // Playlist API functions
 export const fetchPlaylists = async () => {
   return apiRequest('/playlists/');
@@ -80,11 +104,11 @@ export const deletePlaylist = async (playlistId) => {
 
 // Song API functions
 export const fetchPlaylistSongs = async (playlistId) => {
-  return apiRequest(`/playlists/${playlistId}/songs/`);
+  return apiRequestAllPages(`/playlists/${playlistId}/songs/`);
 };
 
 export const fetchAllSongs = async () => {
-  return apiRequest('/songs/');
+  return apiRequestAllPages('/songs/');
 };
 
 export const addSongToPlaylist = async (playlistId, songData) => {
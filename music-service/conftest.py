@@ -1,12 +1,18 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# Tests build their schema directly rather than through migrations
+os.environ.setdefault("DB_SCHEMA_CHECK", "off")
+
 from main import app
 from database import get_db
 from models import Base
+import metrics
 
 # Test database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_music.db"
@@ -24,6 +30,7 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
 
+metrics.instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def override_get_db():
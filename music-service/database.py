@@ -1,26 +1,108 @@
-from sqlalchemy import create_engine, event
+import functools
+import inspect
+
+from fastapi import Depends, params
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from models import Base
+from starlette.responses import Response
+from storage import StorageConfig
+import metrics
+import slow_queries
+
+# Connection, pool and SQLite pragma settings come from the environment,
+# see StorageConfig for the variables
+storage = StorageConfig(default_url="sqlite:///./music.db")
+DATABASE_URL = storage.database_url
 
-DATABASE_URL = "sqlite:///./music.db"
+# Set DB_ASYNC=1 to serve requests from an AsyncSession on the event loop
+# instead of a sync Session on the threadpool
+DB_ASYNC = storage.use_async
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = storage.create_engine()
+metrics.instrument_engine(engine)
+slow_queries.instrument_engine(engine)
 
 # Enable foreign key constraints for SQLite
-@event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
 
+if storage.is_sqlite:
+    event.listen(engine, "connect", set_sqlite_pragma)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+async_engine = storage.create_async_engine() if DB_ASYNC else None
+if async_engine is not None:
+    metrics.instrument_engine(async_engine.sync_engine)
+    slow_queries.instrument_engine(async_engine.sync_engine)
+if async_engine is not None and storage.is_sqlite:
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, bind=async_engine)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def sync_session_only(endpoint):
+    """Keep a route on a sync Session in async mode, e.g. when its response
+    streams rows after the handler has returned."""
+    endpoint.sync_session_only = True
+    return endpoint
+
+def _run_on_async_session(endpoint, response_model):
+    signature = inspect.signature(endpoint)
+    db_param = next((
+        name for name, param in signature.parameters.items()
+        if isinstance(param.default, params.Depends) and param.default.dependency is get_db
+    ), None)
+    if db_param is None or inspect.iscoroutinefunction(endpoint) or getattr(endpoint, "sync_session_only", False):
+        return endpoint
+
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    @functools.wraps(endpoint)
+    async def run_endpoint(**kwargs):
+        async_db = kwargs.pop(db_param)
+
+        def call(db):
+            result = endpoint(**kwargs, **{db_param: db})
+            # Validate while still inside the greenlet so lazy loads can run
+            if adapter is not None and not isinstance(result, Response):
+                result = adapter.validate_python(result, from_attributes=True)
+            return result
+
+        return await async_db.run_sync(call)
+
+    run_endpoint.__signature__ = signature.replace(parameters=[
+        param.replace(default=Depends(get_async_db)) if name == db_param else param
+        for name, param in signature.parameters.items()
+    ])
+    return run_endpoint
+
+class AsyncSessionRoute(APIRoute):
+    """Route class for async mode.
+
+    Handlers written against a sync Session are wrapped in an async endpoint
+    that runs them with AsyncSession.run_sync, so their ORM calls go through
+    the async driver on the event loop rather than blocking a threadpool
+    worker.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        response_model = kwargs.get("response_model")
+        if isinstance(response_model, DefaultPlaceholder):
+            response_model = response_model.value
+        super().__init__(path, _run_on_async_session(endpoint, response_model), **kwargs)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Script to fill the music database with a synthetic dataset for scale testing
+
+Usage:
+    python generate_data.py
+    python generate_data.py --playlists 500000 --songs 20000000
+    DATABASE_URL=sqlite:///./scale.db python generate_data.py --seed 7
+
+The same arguments and --seed always produce the same data. Playlist sizes
+follow a Pareto distribution, so a handful of huge playlists sit on top of
+a long tail of small ones, and artists are picked with Zipf-like
+popularity. Rows are written with bulk inserts in --batch-size chunks.
+Secondary indexes and the full-text search index (with its triggers) are
+dropped for the load and built once at the end.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import func, insert, select, text
+
+import models
+import positions
+import slow_queries
+import migrations
+from database import engine
+
+DEFAULT_BATCH_SIZE = 50000
+PARETO_ALPHA = 1.16
+MAX_WEIGHT = 1000
+
+WORDS = ["love", "night", "heart", "fire", "dream", "summer", "rain", "blue", "gold", "river", "midnight", "road",
+         "light", "wild", "home", "shadow", "city", "ocean", "electric", "paper", "silver", "echo", "storm", "velvet"]
+GENRES = ["Rock", "Jazz", "Indie", "Hip Hop", "Classical", "Workout", "Chill", "Focus", "Party", "Country"]
+
+@contextmanager
+def deferred_indexes(conn, tables):
+    """Drop the tables' secondary indexes for a bulk load and build them once it is done."""
+    indexes = [index for table in tables for index in table.indexes]
+    for index in indexes:
+        index.drop(conn, checkfirst=True)
+    conn.commit()
+    yield
+    for index in indexes:
+        index.create(conn)
+    conn.commit()
+
+def reset_id_sequences(conn, tables):
+    """Move PostgreSQL id sequences past the ids the load inserted explicitly,
+    so the API's next insert does not reuse one; SQLite already uses max(id) + 1."""
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        max_id = select(func.max(table.c.id)).scalar_subquery()
+        # An empty table restarts its sequence at 1
+        conn.execute(select(func.setval(
+            func.pg_get_serial_sequence(table.name, "id"), func.coalesce(max_id, 1), max_id.isnot(None)
+        )))
+
+@contextmanager
+def deferred_search_index(conn):
+    """Drop the songs full-text index and its sync triggers for a bulk load,
+    then build the index once from the loaded rows."""
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    for statement in models.SONG_SEARCH_DROP_DDL:
+        conn.execute(text(statement))
+    conn.commit()
+    yield
+    for statement in models.SONG_SEARCH_DDL:
+        conn.execute(text(statement))
+    conn.execute(text("INSERT INTO songs_fts(songs_fts) VALUES ('rebuild')"))
+    conn.commit()
+
+def pareto_weight(rng: random.Random) -> float:
+    # Capped so one whale can't swallow most of a small dataset
+    return min(rng.paretovariate(PARETO_ALPHA), MAX_WEIGHT)
+
+def insert_batches(conn, table, rows, batch_size):
+    """Insert an iterable of row dicts in batches, committing after each."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.execute(insert(table), batch)
+            conn.commit()
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+        conn.commit()
+
+def title(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).title()
+
+def generate(conn, playlists: int, songs: int, artists: int, seed: int, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """Load a dataset into empty tables through conn; returns row counts."""
+    rng = random.Random(seed)
+    created = datetime(2024, 1, 1)
+
+    def playlist_rows():
+        for i in range(1, playlists + 1):
+            yield {
+                "id": i,
+                "name": f"{rng.choice(GENRES)} {title(rng, 2)}",
+                "description": f"Playlist {i}",
+                "created_at": created + timedelta(minutes=i),
+            }
+
+    artist_names = [f"{title(rng, 2)} {i}" for i in range(1, artists + 1)]
+    artist_weights = list(accumulate(1 / rank for rank in range(1, artists + 1)))
+    playlist_weights = list(accumulate(pareto_weight(rng) for _ in range(playlists)))
+
+    def song_rows():
+        playlist_ids = range(1, playlists + 1)
+        # Songs are appended, so each playlist's keys are consecutive integers
+        last_positions = {}
+        for start in range(1, songs + 1, batch_size):
+            count = min(batch_size, songs + 1 - start)
+            owners = rng.choices(playlist_ids, cum_weights=playlist_weights, k=count)
+            performers = rng.choices(artist_names, cum_weights=artist_weights, k=count)
+            for offset, (playlist_id, artist) in enumerate(zip(owners, performers)):
+                last = last_positions.get(playlist_id)
+                position = last_positions[playlist_id] = positions.FIRST_KEY if last is None else positions.increment_integer(last)
+                yield {
+                    "id": start + offset,
+                    "title": title(rng, rng.randint(1, 4)),
+                    "artist": artist,
+                    "album": title(rng, 2) if rng.random() < 0.8 else None,
+                    "duration": rng.randint(90, 420),
+                    "playlist_id": playlist_id,
+                    "position": position,
+                }
+
+    tables = [models.Playlist.__table__, models.Song.__table__]
+    with deferred_indexes(conn, tables), deferred_search_index(conn):
+        insert_batches(conn, models.Playlist.__table__, playlist_rows(), batch_size)
+        insert_batches(conn, models.Song.__table__, song_rows(), batch_size)
+        reset_id_sequences(conn, tables)
+        conn.commit()
+    return {table.name: conn.execute(select(func.count()).select_from(table)).scalar() for table in tables}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic music dataset")
+    parser.add_argument("--playlists", type=int, default=100000)
+    parser.add_argument("--songs", type=int, default=2000000)
+    parser.add_argument("--artists", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    migrations.upgrade(engine)
+    # Bulk batches are slow by design; keep them out of the slow-query log
+    if slow_queries.slow_query_log.enabled:
+        slow_queries.slow_query_log.remove(engine)
+    started = time.monotonic()
+    with engine.connect() as conn:
+        tables = [models.Playlist.__table__, models.Song.__table__]
+        if any(conn.execute(select(func.count()).select_from(table)).scalar() for table in tables):
+            sys.exit("generate_data.py needs empty tables; point DATABASE_URL at a new database")
+        if engine.dialect.name == "sqlite":
+            # Losing a half-generated dataset to a crash is fine; skip the fsyncs
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        counts = generate(conn, args.playlists, args.songs, args.artists, args.seed, args.batch_size)
+    print(json.dumps({"rows": counts, "seconds": round(time.monotonic() - started, 1)}))
+
+if __name__ == "__main__":
+    main()
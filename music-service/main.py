@@ -1,18 +1,61 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
 import models
 import schemas
-from database import get_db, create_tables
+from database import get_db, engine, DB_ASYNC, AsyncSessionLocal, AsyncSessionRoute
+from responses import FastJSONResponse, fast_response
+import metrics
+import migrations
+import positions
+import profiling
+import search
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if migrations.SCHEMA_CHECK:
+        migrations.check_schema(engine)
+    yield
 
 app = FastAPI(
     title="Music Playlist API",
     description="A simple API to manage music playlists",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
-# Create tables on startup
-create_tables()
+if DB_ASYNC:
+    # Handlers run on an AsyncSession on the event loop instead of the threadpool
+    app.router.route_class = AsyncSessionRoute
+
+# Per-route latency, in-flight and SQL metrics, served on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Requests carrying the X-Profile token are profiled, see profiling.py
+app.add_middleware(profiling.ProfilingMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return metrics.metrics_response()
+
+# Song listings are paged with a cursor: the last id of a full page is
+# returned in the X-Next-Cursor header and passed back as ?after_id=.
+# The song catalog pages on the primary key, playlists in playlist order.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def paginate(query, model, after_id: Optional[int], limit: int, response: Response):
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
 
 # Playlist endpoints
 @app.post("/playlists/", response_model=schemas.Playlist)
@@ -23,9 +66,46 @@ def create_playlist(playlist: schemas.PlaylistCreate, db: Session = Depends(get_
     db.refresh(db_playlist)
     return db_playlist
 
-@app.get("/playlists/", response_model=List[schemas.Playlist])
-def get_playlists(db: Session = Depends(get_db)):
-    return db.query(models.Playlist).all()
+def list_playlists(db: Session, include_songs: bool) -> List[schemas.PlaylistListItem]:
+    # Song counts and durations come from one grouped pass over songs
+    stats = (
+        select(
+            models.Song.playlist_id,
+            func.count(models.Song.id).label("song_count"),
+            func.sum(models.Song.duration).label("total_duration"),
+        )
+        .group_by(models.Song.playlist_id)
+        .subquery()
+    )
+    query = (
+        db.query(models.Playlist, func.coalesce(stats.c.song_count, 0), func.coalesce(stats.c.total_duration, 0))
+        .outerjoin(stats, stats.c.playlist_id == models.Playlist.id)
+        .order_by(models.Playlist.id)
+    )
+    if include_songs:
+        # All songs for the page in a single IN query instead of one per playlist
+        query = query.options(selectinload(models.Playlist.songs))
+
+    items = []
+    for playlist, song_count, total_duration in query.all():
+        fields = {
+            "id": playlist.id,
+            "name": playlist.name,
+            "description": playlist.description,
+            "created_at": playlist.created_at,
+            "song_count": song_count,
+            "total_duration": total_duration,
+        }
+        if include_songs:
+            fields["songs"] = [schemas.Song.model_validate(song) for song in playlist.songs]
+        items.append(schemas.PlaylistListItem(**fields))
+    return items
+
+@app.get("/playlists/", response_model=List[schemas.PlaylistListItem], response_model_exclude_unset=True)
+def get_playlists(include: Optional[schemas.PlaylistInclude] = None, db: Session = Depends(get_db)):
+    """List playlists with their song_count and total_duration; pass
+    include=songs to embed each playlist's songs as well."""
+    return list_playlists(db, include_songs=include == "songs")
 
 @app.get("/playlists/{playlist_id}", response_model=schemas.Playlist)
 def get_playlist(playlist_id: int, db: Session = Depends(get_db)):
@@ -65,19 +145,149 @@ def add_song_to_playlist(playlist_id: int, song: schemas.SongCreate, db: Session
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
-    db_song = models.Song(**song.dict(), playlist_id=playlist_id)
+    # New songs go to the end of the playlist
+    last = db.query(func.max(models.Song.position)).filter(models.Song.playlist_id == playlist_id).scalar()
+    db_song = models.Song(**song.dict(), playlist_id=playlist_id, position=positions.key_between(last, None))
     db.add(db_song)
     db.commit()
     db.refresh(db_song)
     return db_song
 
+@app.post("/playlists/{playlist_id}/songs/bulk", response_model=schemas.SongIds)
+def add_songs_to_playlist(playlist_id: int, bulk: schemas.SongBulkCreate, db: Session = Depends(get_db)):
+    """Append many songs in one transaction; returns their ids in request order."""
+    playlist_exists = db.query(models.Playlist.id).filter(models.Playlist.id == playlist_id).first()
+    if not playlist_exists:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    position = db.query(func.max(models.Song.position)).filter(models.Song.playlist_id == playlist_id).scalar()
+    rows = []
+    for song in bulk.songs:
+        position = positions.key_between(position, None)
+        rows.append({**song.model_dump(), "playlist_id": playlist_id, "position": position})
+    # Sent as multi-row INSERTs. RETURNING order isn't guaranteed and
+    # sort_by_parameter_order would fall back to one INSERT per row on
+    # SQLite, but the new positions increase in request order
+    created = db.execute(insert(models.Song).returning(models.Song.id, models.Song.position), rows).all()
+    db.commit()
+    return {"ids": [song_id for song_id, _ in sorted(created, key=lambda row: row.position)]}
+
+@app.delete("/playlists/{playlist_id}/songs/bulk", response_model=schemas.SongIds)
+def delete_songs_from_playlist(playlist_id: int, bulk: schemas.SongBulkDelete, db: Session = Depends(get_db)):
+    """Delete the given songs of a playlist in one statement; returns the
+    ids that were deleted, ids outside the playlist are skipped."""
+    playlist_exists = db.query(models.Playlist.id).filter(models.Playlist.id == playlist_id).first()
+    if not playlist_exists:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    deleted = db.scalars(
+        delete(models.Song)
+        .where(models.Song.playlist_id == playlist_id, models.Song.id.in_(bulk.ids))
+        .returning(models.Song.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return {"ids": sorted(deleted)}
+
 @app.get("/songs/", response_model=List[schemas.Song])
-def get_all_songs(db: Session = Depends(get_db)):
-    return db.query(models.Song).filter(models.Song.playlist_id.isnot(None)).all()
+def get_all_songs(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    rows = paginate(db.query(models.Song), models.Song, after_id, limit, response)
+    return fast_response(rows, schemas.Song, response)
 
 @app.get("/playlists/{playlist_id}/songs/", response_model=List[schemas.Song])
-def get_playlist_songs(playlist_id: int, db: Session = Depends(get_db)):
-    return db.query(models.Song).filter(models.Song.playlist_id == playlist_id).all()
+def get_playlist_songs(
+    playlist_id: int,
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Songs in playlist order. Pages are keyed on (position, id); the
+    cursor is still the id of the last song on the previous page."""
+    query = db.query(models.Song).filter(models.Song.playlist_id == playlist_id)
+    if after_id is not None:
+        after = db.query(models.Song.position).filter(
+            models.Song.id == after_id, models.Song.playlist_id == playlist_id
+        ).scalar()
+        if after is None:
+            raise HTTPException(status_code=400, detail="after_id is not a song in this playlist")
+        query = query.filter(or_(
+            models.Song.position > after,
+            and_(models.Song.position == after, models.Song.id > after_id),
+        ))
+    rows = query.order_by(models.Song.position, models.Song.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return fast_response(rows, schemas.Song, response)
+
+@app.patch("/playlists/{playlist_id}/songs/{song_id}/move", response_model=schemas.Song)
+def move_song(
+    playlist_id: int,
+    song_id: int,
+    move: schemas.SongMove,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """Move a song right after another one, or to the top. Only the moved
+    song's row is written."""
+    song = db.query(models.Song).filter(models.Song.id == song_id, models.Song.playlist_id == playlist_id).first()
+    if not song:
+        raise HTTPException(status_code=404, detail="Song not found")
+    if move.after_song_id == song_id:
+        raise HTTPException(status_code=400, detail="A song cannot be moved after itself")
+
+    lower = None
+    if move.after_song_id is not None:
+        lower = db.query(models.Song.position).filter(
+            models.Song.id == move.after_song_id, models.Song.playlist_id == playlist_id
+        ).scalar()
+        if lower is None:
+            raise HTTPException(status_code=404, detail="Song to move after not found")
+    # The song that will follow, not counting the one being moved
+    following = db.query(models.Song.position).filter(
+        models.Song.playlist_id == playlist_id, models.Song.id != song_id
+    )
+    if lower is not None:
+        following = following.filter(models.Song.position > lower)
+    upper = following.order_by(models.Song.position).limit(1).scalar()
+
+    song.position = positions.key_between(lower, upper)
+    db.commit()
+    db.refresh(song)
+
+    if len(song.position) > positions.MAX_POSITION_LENGTH:
+        # Repeated moves into one gap grow keys; shorten them off the request path
+        if DB_ASYNC:
+            background_tasks.add_task(positions.rebalance_in_background_async, AsyncSessionLocal, playlist_id)
+        else:
+            background_tasks.add_task(positions.rebalance_in_background, db.get_bind(), playlist_id)
+    return song
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+@app.get("/songs/search", response_model=List[schemas.Song])
+def search_songs(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Best matches first for songs whose title, artist or album contain
+    words starting with every word of q. X-Search-Matches gives the number
+    of matches and X-Search-Ranking how they were ranked (see search.py)."""
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Song search needs the SQLite FTS5 index")
+    result = search.search_songs(db, q, limit)
+    response.headers["X-Search-Matches"] = str(result.matches)
+    response.headers["X-Search-Ranking"] = result.ranking
+    return fast_response(result.songs, schemas.Song, response)
 
 @app.delete("/songs/{song_id}")
 def delete_song(song_id: int, db: Session = Depends(get_db)):
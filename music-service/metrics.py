@@ -0,0 +1,264 @@
+"""In-process Prometheus-style metrics, exposed as text on /metrics.
+
+MetricsMiddleware records per-route request counts, latency and in-flight
+requests. instrument_engine hooks SQLAlchemy engine events to time every
+statement and attribute it to the request that ran it, and times how long
+requests wait for a pooled connection. Recording is a lock plus a bisect
+per observation, cheap enough to leave on in production. Metrics are per
+process; with several workers each one is scraped separately.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from starlette.responses import Response
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+# Requests that match no route share one label so unknown paths can't grow the series
+UNMATCHED_ROUTE = "<unmatched>"
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield from self._render_series(labels, value)
+
+    def _render_series(self, labels, value):
+        yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds, as Prometheus expects."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._values.get(labels)
+        return series[2] if series else 0
+
+    def sum(self, *labels) -> float:
+        series = self._values.get(labels)
+        return series[1] if series else 0.0
+
+    def _render_series(self, labels, series):
+        counts, total, count = series[0][:], series[1], series[2]
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = 'le="{}"'.format(_format_value(bound))
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+        yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled, by route template and status.", ("method", "route", "status"))
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Time to produce the full response.", ("method", "route"))
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled.")
+REQUEST_SQL_STATEMENTS = registry.histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", ("method", "route"), buckets=COUNT_BUCKETS)
+REQUEST_SQL_DURATION = registry.histogram(
+    "http_request_sql_duration_seconds", "Time spent executing SQL per request.", ("method", "route"))
+SQL_STATEMENTS = registry.counter(
+    "db_statements_total", "SQL statements executed, including those outside requests.")
+SQL_DURATION = registry.histogram(
+    "db_statement_duration_seconds", "Time to execute one SQL statement.")
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.")
+
+class RequestStats:
+    __slots__ = ("scope", "statements", "sql_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+# The stats object is shared with the threadpool worker or greenlet that runs
+# the handler, since both copy the request's context
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def current_route() -> Optional[str]:
+    """Method and route template of the request being handled, if any."""
+    stats = current_request.get()
+    if stats is None:
+        return None
+    route = stats.scope.get("route")
+    return f"{stats.scope['method']} {getattr(route, 'path', UNMATCHED_ROUTE)}"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+    SQL_STATEMENTS.inc()
+    SQL_DURATION.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    starts = exception_context.connection.info.get("metrics_query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+def _time_checkout(connect):
+    @functools.wraps(connect)
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+    return timed_connect
+
+def instrument_engine(engine):
+    """Record statement counts and timings and pool waits for a sync engine
+    (use async_engine.sync_engine for an async one)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    # The pool has no event for the start of a checkout, so time Engine.connect,
+    # which sessions (sync and async) go through; unlike the pool it survives dispose()
+    engine.connect = _time_checkout(engine.connect)
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics under the matched route
+    template (e.g. /customers/{customer_id}), not the raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            current_request.reset(token)
+            # The router stores the matched route on the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            REQUESTS.inc(method, path, str(status))
+            REQUEST_DURATION.observe(elapsed, method, path)
+            REQUEST_SQL_STATEMENTS.observe(stats.statements, method, path)
+            REQUEST_SQL_DURATION.observe(stats.sql_seconds, method, path)
+
+def metrics_response() -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
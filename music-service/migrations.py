@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations
+
+Usage:
+    python migrations.py upgrade [--to VERSION]
+    python migrations.py current
+
+Schema changes run once per deploy through "upgrade", never at import or
+app startup. Each applied migration is recorded in the schema_migrations
+table. At startup the app only reads the highest recorded version and
+refuses to start if it is behind LATEST_VERSION (set DB_SCHEMA_CHECK=off to
+skip the check). A newer schema is accepted, so migrations can be applied
+ahead of a rolling deploy as long as they stay backward compatible.
+
+Migrations must be safe to run against a database that the baseline
+create_all already brought up to date, i.e. check before they alter.
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+
+import models
+import positions
+
+SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "on").lower() not in ("0", "off", "false", "no")
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+def _baseline(conn):
+    # Also adopts databases created by the old import-time create_all
+    models.Base.metadata.create_all(bind=conn)
+
+def _index_song_playlist_id(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_songs_playlist_id ON songs (playlist_id)"))
+
+BACKFILL_BATCH_SIZE = 50000
+
+def _add_song_positions(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("songs")}
+    if "position" not in columns:
+        # Bytewise comparison, see models.Song.position
+        collation = ' COLLATE "C"' if conn.dialect.name == "postgresql" else ""
+        conn.execute(text(f"ALTER TABLE songs ADD COLUMN position VARCHAR{collation}"))
+    # Existing playlists keep their insertion order; walk songs in
+    # (playlist_id, id) order a batch at a time
+    select_batch = text(
+        "SELECT id, playlist_id FROM songs WHERE playlist_id > :playlist_id OR (playlist_id = :playlist_id AND id > :song_id) "
+        "ORDER BY playlist_id, id LIMIT :limit"
+    )
+    set_position = text("UPDATE songs SET position = :position WHERE id = :song_id AND position IS NULL")
+    last_playlist, last_song, key = -1, -1, None
+    while True:
+        rows = conn.execute(select_batch, {"playlist_id": last_playlist, "song_id": last_song,
+                                           "limit": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        updates = []
+        for song_id, playlist_id in rows:
+            key = positions.FIRST_KEY if playlist_id != last_playlist else positions.increment_integer(key)
+            last_playlist, last_song = playlist_id, song_id
+            updates.append({"song_id": song_id, "position": key})
+        conn.execute(set_position, updates)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_songs_playlist_id_position ON songs (playlist_id, position)"))
+    # Redundant with the leading column of the new index
+    conn.execute(text("DROP INDEX IF EXISTS ix_songs_playlist_id"))
+
+def _add_song_search_index(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    for statement in models.SONG_SEARCH_DDL:
+        conn.execute(text(statement))
+    # Index the songs that are already there
+    conn.execute(text("INSERT INTO songs_fts(songs_fts) VALUES ('rebuild')"))
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", _baseline),
+    Migration(2, "index songs.playlist_id", _index_song_playlist_id),
+    Migration(3, "songs.position for playlist order", _add_song_positions),
+    Migration(4, "full-text search index on songs", _add_song_search_index),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+def upgrade(engine, target: Optional[int] = None) -> list:
+    """Apply pending migrations up to target (default: all); returns the versions applied."""
+    target = LATEST_VERSION if target is None else target
+    with engine.begin() as conn:
+        migration_metadata.create_all(bind=conn)
+        version = current_version(conn)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if version < migration.version <= target:
+            # One transaction per migration, recorded together with its changes
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version, description=migration.description))
+            applied.append(migration.version)
+    return applied
+
+def check_schema(engine):
+    """Fail fast if the database is missing migrations this code needs."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version} but this code needs {LATEST_VERSION}; "
+            "run `python migrations.py upgrade`"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the database schema version")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subcommands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, dest="target", help="stop at this version")
+    subcommands.add_parser("current", help="print the applied and latest versions")
+    args = parser.parse_args(argv)
+
+    from database import engine
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.target)
+        print(json.dumps({"applied": applied}))
+    else:
+        with engine.connect() as conn:
+            print(json.dumps({"current": current_version(conn), "latest": LATEST_VERSION}))
+
+if __name__ == "__main__":
+    main()
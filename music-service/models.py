@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, DateTime, ForeignKey, Index, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,7 +13,8 @@ class Playlist(Base):
     description = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    songs = relationship("Song", back_populates="playlist", cascade="all, delete-orphan")
+    songs = relationship("Song", back_populates="playlist", cascade="all, delete-orphan",
+                         order_by="(Song.position, Song.id)")
 
 class Song(Base):
     __tablename__ = "songs"
@@ -24,5 +25,45 @@ class Song(Base):
     album = Column(String)
     duration = Column(Integer)  # duration in seconds
     playlist_id = Column(Integer, ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False)
+    # Fractional key giving the song's place in its playlist, see positions.py.
+    # Keys must compare bytewise ('Zz' < 'a0'); SQLite's default BINARY
+    # collation does, PostgreSQL needs "C" instead of its locale collation
+    position = Column(String().with_variant(String(collation="C"), "postgresql"), nullable=False)
     
-    playlist = relationship("Playlist", back_populates="songs")
\ No newline at end of file
+    playlist = relationship("Playlist", back_populates="songs")
+
+    # Serves per-playlist lookups and the position-ordered listing; SQLite
+    # indexes carry the rowid, so (position, id) comes straight off the index
+    __table_args__ = (Index("ix_songs_playlist_id_position", "playlist_id", "position"),)
+# Full-text index over songs for /songs/search (SQLite only). An FTS5
+# external-content table stores just the index; triggers keep it in sync
+# with songs, and moves, which only change position, never touch it.
+SONG_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+        title, artist, album, content='songs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    # Rank title matches above artist, and artist above album
+    "INSERT INTO songs_fts(songs_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 2.0)')",
+    """CREATE TRIGGER IF NOT EXISTS songs_fts_insert AFTER INSERT ON songs BEGIN
+        INSERT INTO songs_fts(rowid, title, artist, album) VALUES (new.id, new.title, new.artist, new.album);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS songs_fts_delete AFTER DELETE ON songs BEGIN
+        INSERT INTO songs_fts(songs_fts, rowid, title, artist, album) VALUES ('delete', old.id, old.title, old.artist, old.album);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS songs_fts_update AFTER UPDATE OF title, artist, album ON songs BEGIN
+        INSERT INTO songs_fts(songs_fts, rowid, title, artist, album) VALUES ('delete', old.id, old.title, old.artist, old.album);
+        INSERT INTO songs_fts(rowid, title, artist, album) VALUES (new.id, new.title, new.artist, new.album);
+    END""",
+]
+
+SONG_SEARCH_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS songs_fts_insert",
+    "DROP TRIGGER IF EXISTS songs_fts_delete",
+    "DROP TRIGGER IF EXISTS songs_fts_update",
+    "DROP TABLE IF EXISTS songs_fts",
+]
+
+for statement in SONG_SEARCH_DDL:
+    event.listen(Song.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in SONG_SEARCH_DROP_DDL:
+    event.listen(Song.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
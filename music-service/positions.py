@@ -0,0 +1,159 @@
+"""Fractional position keys for ordering songs within a playlist.
+
+A position is a string that sorts lexicographically in playlist order, so
+a song can be moved by giving it a key between its new neighbours without
+touching any other row. Keys follow the usual fractional-indexing layout:
+an integer part whose first character encodes its length ("a0", "a1", ...,
+"az", "b100", ...; "Zz", "Zy", ... below "a0") followed by an optional
+base-62 fraction. Appending increments the integer, which keeps keys short
+as playlists grow; repeated moves into the same gap lengthen the fraction
+by about one character per six moves. Once a key grows past
+MAX_POSITION_LENGTH the playlist is rebalanced, rewriting its keys as
+consecutive integers.
+"""
+from typing import Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+import models
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+FIRST_KEY = "a0"
+SMALLEST_INTEGER = "A" + "0" * 26
+MAX_POSITION_LENGTH = 24
+
+def _digit(char: str) -> int:
+    return DIGITS.index(char)
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"Invalid position key head: {head!r}")
+
+def _integer_part(key: str) -> str:
+    return key[:_integer_length(key[0])]
+
+def _midpoint(lower: str, upper: Optional[str]) -> str:
+    """Fraction digits strictly between lower and upper (None: 1)."""
+    if upper is not None:
+        # Copy the shared prefix, treating missing lower digits as zeros
+        n = 0
+        while (lower[n] if n < len(lower) else "0") == upper[n]:
+            n += 1
+        if n > 0:
+            return upper[:n] + _midpoint(lower[n:], upper[n:])
+    low = _digit(lower[0]) if lower else 0
+    high = _digit(upper[0]) if upper is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high + 1) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[low] + _midpoint(lower[1:], None)
+
+def increment_integer(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        value = _digit(digits[i]) + 1
+        if value < BASE:
+            digits[i] = DIGITS[value]
+            return head + "".join(digits)
+        digits[i] = "0"
+    if head == "Z":
+        return FIRST_KEY
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append("0")
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def decrement_integer(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        value = _digit(digits[i]) - 1
+        if value >= 0:
+            digits[i] = DIGITS[value]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def key_between(lower: Optional[str], upper: Optional[str]) -> str:
+    """A key that sorts strictly between lower and upper; None is an open end."""
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f"{lower!r} is not below {upper!r}")
+    if lower is None and upper is None:
+        return FIRST_KEY
+    if lower is None:
+        integer = _integer_part(upper)
+        fraction = upper[len(integer):]
+        if integer == SMALLEST_INTEGER:
+            return integer + _midpoint("", fraction)
+        if integer < upper:
+            return integer
+        decremented = decrement_integer(integer)
+        if decremented is None:
+            raise ValueError("Cannot place a key before the smallest integer")
+        return decremented
+    integer = _integer_part(lower)
+    fraction = lower[len(integer):]
+    if upper is None:
+        incremented = increment_integer(integer)
+        return integer + _midpoint(fraction, None) if incremented is None else incremented
+    if integer == _integer_part(upper):
+        return integer + _midpoint(fraction, upper[len(integer):])
+    incremented = increment_integer(integer)
+    if incremented is not None and incremented < upper:
+        return incremented
+    return integer + _midpoint(fraction, None)
+
+def sequential_keys(count: int):
+    """count evenly spaced keys, starting at FIRST_KEY."""
+    key = FIRST_KEY
+    for _ in range(count):
+        yield key
+        key = increment_integer(key)
+
+def rebalance_playlist(db: Session, playlist_id: int) -> int:
+    """Rewrite the playlist's positions as consecutive integers, keeping the
+    current order; returns the number of songs."""
+    song = models.Song.__table__
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite ignores FOR UPDATE and reads outside a transaction; a no-op
+        # write takes the database write lock first so no move lands in between
+        db.execute(update(song).where(song.c.playlist_id == playlist_id).values(position=song.c.position))
+    song_ids = [
+        song_id for song_id, in db.query(models.Song.id)
+        .filter(models.Song.playlist_id == playlist_id)
+        .order_by(models.Song.position, models.Song.id)
+        .with_for_update()
+    ]
+    db.execute(
+        update(song).where(song.c.id == bindparam("song_id")).values(position=bindparam("new_position")),
+        [{"song_id": song_id, "new_position": key} for song_id, key in zip(song_ids, sequential_keys(len(song_ids)))],
+    )
+    db.commit()
+    return len(song_ids)
+
+def rebalance_in_background(bind, playlist_id: int):
+    """Background task: rebalance on a session of its own, after the response went out."""
+    with Session(bind=bind) as db:
+        rebalance_playlist(db, playlist_id)
+
+async def rebalance_in_background_async(session_factory, playlist_id: int):
+    async with session_factory() as db:
+        await db.run_sync(rebalance_playlist, playlist_id)
@@ -0,0 +1,155 @@
+"""On-demand sampling profiler for single requests.
+
+Set PROFILE_TOKEN to enable it, then send the token in an X-Profile header:
+
+    curl -H "X-Profile: $PROFILE_TOKEN" http://localhost:8000/playlists/
+
+While that request is being handled, a background thread samples the stacks
+of the process's busy threads every PROFILE_INTERVAL_MS. When the response
+starts, the samples are written to PROFILE_DIR in collapsed-stack format
+(one "frame;frame;frame count" line per stack, readable by flamegraph.pl or
+speedscope). The functions most often on top of the stack are returned in
+X-Profile-Top.
+
+Samples are taken process-wide, so requests running at the same time show
+up too. At most PROFILE_MAX_CONCURRENT requests are profiled at once; any
+others are served normally with "X-Profile: skipped".
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", 1))
+
+HEADER = b"x-profile"
+TOP_FRAMES = 5
+MAX_STACK_DEPTH = 128
+
+# Leaf frames of threads that are blocked waiting for work rather than running it
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples the stacks of every other thread until stopped."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def top_functions(self, limit: int = TOP_FRAMES):
+        """Functions most often at the top of the stack, i.e. where time went."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack[-1]] += count
+        return leaves.most_common(limit)
+
+    def write_collapsed(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that carry the X-Profile token."""
+
+    def __init__(self, app, token: str = PROFILE_TOKEN, directory: str = PROFILE_DIR,
+                 interval_ms: float = PROFILE_INTERVAL_MS, max_concurrent: int = PROFILE_MAX_CONCURRENT):
+        self.app = app
+        self.token = token.encode()
+        self.directory = directory
+        self.interval = interval_ms / 1000
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def _requested(self, scope) -> bool:
+        if not self.token or scope["type"] != "http":
+            return False
+        for name, value in scope["headers"]:
+            if name == HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._slots.acquire(blocking=False):
+            async def send_skipped(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", []).append((HEADER, b"skipped"))
+                await send(message)
+
+            await self.app(scope, receive, send_skipped)
+            return
+
+        profiler = SamplingProfiler(self.interval)
+        stopped = False
+
+        def finish():
+            nonlocal stopped
+            stopped = True
+            profiler.stop()
+            self._slots.release()
+
+        async def send_profiled(message):
+            # Streaming bodies are sent after this point and are not profiled
+            if message["type"] == "http.response.start" and not stopped:
+                finish()
+                message.setdefault("headers", []).extend(self._write(scope, profiler))
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            if not stopped:
+                finish()
+
+    def _write(self, scope, profiler: SamplingProfiler):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{uuid.uuid4().hex[:8]}.collapsed"
+        profiler.write_collapsed(os.path.join(self.directory, name))
+        top = "; ".join(f"{label} {count}" for label, count in profiler.top_functions())
+        return [
+            (b"x-profile-file", name.encode()),
+            (b"x-profile-samples", str(profiler.samples).encode()),
+            (b"x-profile-top", top.encode("latin-1", "replace")),
+        ]
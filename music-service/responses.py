@@ -0,0 +1,56 @@
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Optional, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+# Set VALIDATE_RESPONSES=1 to send fast-path responses through full Pydantic
+# validation as well, e.g. while checking a schema change
+VALIDATE_RESPONSES = os.getenv("VALIDATE_RESPONSES", "").lower() in ("1", "true", "yes")
+
+def _default(value):
+    # Same wire format as Pydantic: Decimals as strings ("100.00"), ISO 8601 dates
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, with Decimal/datetime handling
+    that matches the Pydantic output of the regular response_model path."""
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def fast_response(rows: Iterable, schema: Type[BaseModel], response: Optional[Response] = None) -> FastJSONResponse:
+    """Serialize ORM rows for a flat schema without Pydantic validation.
+
+    Only the schema's fields are copied, so the body matches what
+    response_model would produce. Routes that need full validation (nested
+    schemas, computed values) should keep returning objects for FastAPI to
+    validate. Headers set on the injected response, such as the pagination
+    cursor, are carried over.
+    """
+    if VALIDATE_RESPONSES:
+        content = [schema.model_validate(row).model_dump(mode="json") for row in rows]
+    else:
+        fields = tuple(schema.model_fields)
+        content = [{field: getattr(row, field) for field in fields} for row in rows]
+    result = FastJSONResponse(content)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
@@ -1,14 +1,60 @@
 #!/usr/bin/env python3
 """
 Script to run the Music Playlist API server
+
+Usage:
+    python run.py                      # development: one process, auto-reload
+    APP_ENV=production python run.py   # production profile
+
+The production profile runs WEB_CONCURRENCY worker processes (default: one
+per CPU) on uvloop and httptools when they are installed, falling back to
+asyncio and h11 otherwise. It has no file watcher. Connections are kept
+alive for KEEP_ALIVE_SECONDS, longer than the 60s idle timeout of common
+load balancers, so they don't drop connections the server still thinks
+are open. The listen backlog is BACKLOG. On SIGTERM, in-flight requests
+get GRACEFUL_SHUTDOWN_SECONDS to finish before workers exit; the default
+fits within docker stop's 10 second grace period.
 """
+import os
+from importlib.util import find_spec
+
 import uvicorn
-from main import app
+
+DEFAULT_PORT = 8000
+
+def _env_int(environ, name: str, default: int) -> int:
+    return int(environ.get(name, default))
+
+def server_config(environ=os.environ) -> dict:
+    """uvicorn.run keyword arguments for the APP_ENV profile."""
+    config = {
+        "app": "main:app",
+        "host": environ.get("HOST", "0.0.0.0"),
+        "port": _env_int(environ, "PORT", DEFAULT_PORT),
+    }
+    if environ.get("APP_ENV", "development") != "production":
+        config["reload"] = True
+        return config
+
+    config.update(
+        workers=_env_int(environ, "WEB_CONCURRENCY", os.cpu_count() or 1),
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11",
+        timeout_keep_alive=_env_int(environ, "KEEP_ALIVE_SECONDS", 75),
+        backlog=_env_int(environ, "BACKLOG", 2048),
+        timeout_graceful_shutdown=_env_int(environ, "GRACEFUL_SHUTDOWN_SECONDS", 8),
+        # Per-request access lines are costly at high request rates; /metrics covers them
+        access_log=environ.get("ACCESS_LOG", "").lower() in ("1", "true", "yes"),
+        server_header=False,
+    )
+    return config
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
\ No newline at end of file
+    config = server_config()
+    if config.get("reload"):
+        # Local databases are migrated automatically; deploys run
+        # `python migrations.py upgrade` as a separate step
+        import migrations
+        from database import engine
+        migrations.upgrade(engine)
+    uvicorn.run(**config)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class SongBase(BaseModel):
@@ -14,10 +14,27 @@ class SongCreate(SongBase):
 class Song(SongBase):
     id: int
     playlist_id: int
+    position: str
     
     class Config:
         from_attributes = True
 
+# Upper bound on songs per bulk request
+MAX_BULK_SONGS = 5000
+
+class SongBulkCreate(BaseModel):
+    songs: List[SongCreate] = Field(..., min_length=1, max_length=MAX_BULK_SONGS)
+
+class SongBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_SONGS)
+
+class SongIds(BaseModel):
+    ids: List[int]
+
+class SongMove(BaseModel):
+    # Place the song right after this one; null moves it to the top
+    after_song_id: Optional[int] = None
+
 class PlaylistBase(BaseModel):
     name: str
     description: Optional[str] = None
@@ -31,4 +48,17 @@ class Playlist(PlaylistBase):
     songs: List[Song] = []
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PlaylistListItem(PlaylistBase):
+    id: int
+    created_at: datetime
+    song_count: int
+    total_duration: int  # seconds
+    # Only present when requested with ?include=songs
+    songs: List[Song] = []
+
+    class Config:
+        from_attributes = True
+
+PlaylistInclude = Literal["songs"]
@@ -0,0 +1,90 @@
+"""Full-text song search on the songs_fts FTS5 index (see models.py).
+
+User input is never passed to MATCH as-is: it is split into word terms and
+each term becomes a quoted prefix query, so "beat  it!" searches for
+"beat"* AND "it"* and FTS5 syntax characters can't cause errors.
+"""
+import os
+import re
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import models
+
+TERM = re.compile(r"\w+")
+MAX_TERMS = 16
+
+# bm25 has to score every match, and scoring is most of the cost of a
+# search: a term matching 75k of 300k songs takes ~180 ms to rank, while
+# counting its matches takes ~10 ms. So matches are counted first and
+# ranking picks a tier from the count:
+#   exact   all matches ranked; whenever there are at most
+#           SEARCH_EXACT_RANK_MAX_MATCHES
+#   title   only matches in the title column ranked, topped up from the
+#           recent tier if they are fewer than the limit; a broad term
+#           still finds an older song titled exactly after it
+#   recent  the title matches are too many as well; only the RANK_WINDOW
+#           most recently added of them are ranked
+# The route reports the tier and the match count in response headers.
+EXACT_RANK_MAX_MATCHES = int(os.getenv("SEARCH_EXACT_RANK_MAX_MATCHES", 50000))
+RANK_WINDOW = 5000
+
+# Songs titled exactly q come first; bm25 alone would put "Love Love Love"
+# above "Love". Ranking happens inside the index so only the top hits are
+# joined to songs.
+RANKED_SQL = """
+    SELECT songs.* FROM (
+        SELECT rowid, title = :title COLLATE NOCASE AS exact_title, rank FROM songs_fts
+        WHERE songs_fts MATCH :query{window}
+        ORDER BY exact_title DESC, rank LIMIT :limit
+    ) AS hits
+    JOIN songs ON songs.id = hits.rowid
+    ORDER BY hits.exact_title DESC, hits.rank
+"""
+# The window start comes from a rowid-ordered walk of the index
+WINDOW = """ AND rowid >= coalesce((
+            SELECT rowid FROM songs_fts WHERE songs_fts MATCH :query ORDER BY rowid DESC LIMIT 1 OFFSET :window
+        ), 0)"""
+EXACT_SQL = text(RANKED_SQL.format(window=""))
+WINDOWED_SQL = text(RANKED_SQL.format(window=WINDOW))
+COUNT_SQL = text("SELECT count(*) FROM songs_fts WHERE songs_fts MATCH :query")
+
+class SearchResult(NamedTuple):
+    songs: List[models.Song]
+    matches: int
+    ranking: str
+
+def match_query(q: str) -> Optional[str]:
+    """FTS5 query matching every term of q as a prefix; None if q has no terms."""
+    terms = TERM.findall(q)[:MAX_TERMS]
+    return " ".join(f'"{term}"*' for term in terms) or None
+
+def _count(db: Session, query: str) -> int:
+    return db.execute(COUNT_SQL, {"query": query}).scalar()
+
+def _ranked(db: Session, sql, query: str, title: str, limit: int) -> List[models.Song]:
+    params = {"query": query, "title": title, "limit": limit}
+    if sql is WINDOWED_SQL:
+        params["window"] = RANK_WINDOW
+    return db.query(models.Song).from_statement(sql.bindparams(**params)).all()
+
+def search_songs(db: Session, q: str, limit: int) -> SearchResult:
+    query = match_query(q)
+    if query is None:
+        return SearchResult([], 0, "exact")
+    title = q.strip()
+    matches = _count(db, query)
+    if matches <= EXACT_RANK_MAX_MATCHES:
+        return SearchResult(_ranked(db, EXACT_SQL, query, title, limit), matches, "exact")
+
+    title_query = f"{{title}} : ({query})"
+    if _count(db, title_query) > EXACT_RANK_MAX_MATCHES:
+        return SearchResult(_ranked(db, WINDOWED_SQL, title_query, title, limit), matches, "recent")
+    songs = _ranked(db, EXACT_SQL, title_query, title, limit)
+    if len(songs) < limit:
+        seen = {song.id for song in songs}
+        more = _ranked(db, WINDOWED_SQL, query, title, limit + len(seen))
+        songs += [song for song in more if song.id not in seen][:limit - len(songs)]
+    return SearchResult(songs, matches, "title")
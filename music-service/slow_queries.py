@@ -0,0 +1,146 @@
+"""Slow-query log with the query plan attached.
+
+Statements slower than SLOW_QUERY_MS (default 200, negative disables) are
+logged with their parameters, the route that ran them and the plan from
+EXPLAIN QUERY PLAN (EXPLAIN for SELECTs on PostgreSQL). The plan is only
+fetched for statements that were already slow, so fast queries pay for a
+timer and nothing else.
+
+Full-table scans in those plans are counted per table and route. Once the
+same scan has been seen SLOW_QUERY_SCAN_REPEATS times it is flagged as a
+candidate for an index.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_SCAN_REPEATS = int(os.getenv("SLOW_QUERY_SCAN_REPEATS", 3))
+
+# SQLite reports every pass over a whole table or index as "SCAN songs [USING ... INDEX ...]"
+# (lookups are "SEARCH"); PostgreSQL as "Seq Scan on songs"
+FULL_SCAN = re.compile(r"^\s*(?:->\s*)?(?:SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)|Seq Scan on (\w+))")
+# Not table scans: a virtual table scan with a constraint (e.g. an FTS5
+# MATCH) is an index lookup, and scanning a subquery or CTE that SQLite
+# materialized or runs as a co-routine reads a temporary result
+VIRTUAL_TABLE_LOOKUP = re.compile(r"VIRTUAL TABLE INDEX \d+:\S")
+SUBQUERY = re.compile(r"^\s*(?:MATERIALIZE|CO-ROUTINE) (\w+)")
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+MAX_PARAMETERS_LENGTH = 1000
+
+def _truncate(text: str) -> str:
+    if len(text) <= MAX_PARAMETERS_LENGTH:
+        return text
+    return text[:MAX_PARAMETERS_LENGTH] + "..."
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, scan_repeats: int = SLOW_QUERY_SCAN_REPEATS):
+        self.threshold = threshold_ms / 1000
+        self.scan_repeats = scan_repeats
+        # (table, route) -> slow statements whose plan scanned the whole table
+        self.scans = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold >= 0
+
+    def install(self, engine):
+        """Watch statements on a sync engine (async_engine.sync_engine for an async one)."""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def remove(self, engine):
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.remove(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        starts = exception_context.connection.info.get("slow_query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if elapsed < self.threshold:
+            return
+
+        route = metrics.current_route()
+        # Explain an executemany with its first parameter set
+        explain_parameters = parameters[0] if executemany and parameters else parameters
+        plan = self.explain(conn, statement, explain_parameters)
+        logger.warning(
+            "Slow query (%.1f ms) route=%s statement=%s parameters=%s plan=%s",
+            elapsed * 1000, route or "-", " ".join(statement.split()), _truncate(repr(parameters)),
+            " | ".join(plan) if plan is not None else "unavailable",
+        )
+        for table in self.full_scans(plan or ()):
+            self._count_scan(table, route)
+
+    def explain(self, conn, statement: str, parameters) -> Optional[list]:
+        """Plan lines for statement, or None if it can't be explained."""
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        if conn.dialect.name == "sqlite" and keyword in EXPLAINABLE:
+            prefix, detail_column = "EXPLAIN QUERY PLAN ", -1
+        elif conn.dialect.name == "postgresql" and keyword in ("SELECT", "WITH"):
+            # Plain EXPLAIN doesn't run the query; it is limited to reads so a
+            # failure can't abort a write transaction halfway
+            prefix, detail_column = "EXPLAIN ", 0
+        else:
+            return None
+
+        # Use a raw DBAPI cursor so the EXPLAIN itself isn't timed or logged
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [str(row[detail_column]) for row in cursor.fetchall()]
+        except Exception:
+            logger.debug("Could not explain slow query", exc_info=True)
+            return None
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def full_scans(plan) -> list:
+        tables, subqueries = [], set()
+        for line in plan:
+            subquery = SUBQUERY.match(line)
+            if subquery:
+                subqueries.add(subquery.group(1))
+                continue
+            match = FULL_SCAN.match(line)
+            if match and not VIRTUAL_TABLE_LOOKUP.search(line):
+                table = match.group(1) or match.group(2)
+                if table not in subqueries:
+                    tables.append(table)
+        return tables
+
+    def _count_scan(self, table: str, route: Optional[str]):
+        with self._lock:
+            self.scans[(table, route)] += 1
+            count = self.scans[(table, route)]
+        if count == self.scan_repeats:
+            logger.warning(
+                "Repeated full scan of %s from route=%s (%d slow queries); consider an index",
+                table, route or "-", count,
+            )
+
+slow_query_log = SlowQueryLog()
+
+def instrument_engine(engine):
+    if slow_query_log.enabled:
+        slow_query_log.install(engine)
@@ -0,0 +1,77 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import main
+from database import AsyncSessionRoute, get_async_db, set_sqlite_pragma
+from models import Base
+
+@pytest.fixture
+def async_client(tmp_path):
+    # Rebuild the app's routes with the async-mode route class
+    app = FastAPI()
+    app.router.route_class = AsyncSessionRoute
+    for route in main.app.routes:
+        if isinstance(route, APIRoute):
+            app.add_api_route(route.path, route.endpoint, methods=list(route.methods), response_model=route.response_model)
+
+    db_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+    AsyncTestingSessionLocal = async_sessionmaker(autoflush=False, bind=async_engine)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as c:
+        yield c
+
+def test_async_mode_wraps_session_routes():
+    route = AsyncSessionRoute("/playlists/{playlist_id}", main.get_playlist, response_model=None)
+    assert route.dependant.dependencies[0].call is get_async_db
+
+def test_async_mode_end_to_end(async_client, sample_playlist_data, sample_song_data):
+    response = async_client.post("/playlists/", json=sample_playlist_data)
+    assert response.status_code == 200
+    assert response.json()["songs"] == []
+    playlist_id = response.json()["id"]
+
+    response = async_client.post(f"/playlists/{playlist_id}/songs/", json=sample_song_data)
+    assert response.status_code == 200
+    song_id = response.json()["id"]
+
+    # Songs are lazy loaded while the response is validated
+    response = async_client.get(f"/playlists/{playlist_id}")
+    assert response.status_code == 200
+    assert response.json()["songs"][0]["id"] == song_id
+
+    response = async_client.get("/playlists/", params={"include": "songs"})
+    assert response.status_code == 200
+    assert response.json()[0]["songs"][0]["id"] == song_id
+
+    response = async_client.delete(f"/playlists/{playlist_id}")
+    assert response.status_code == 200
+
+    # Cascade relies on the foreign key pragma being set on async connections
+    response = async_client.get("/songs/")
+    assert response.json() == []
+
+    response = async_client.get("/playlists/999")
+    assert response.status_code == 404
+
+def test_async_mode_moves_songs(async_client, sample_playlist_data, sample_song_data):
+    playlist_id = async_client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    first, second = (async_client.post(f"/playlists/{playlist_id}/songs/", json=sample_song_data).json()["id"] for _ in range(2))
+
+    response = async_client.patch(f"/playlists/{playlist_id}/songs/{second}/move", json={"after_song_id": None})
+    assert response.status_code == 200
+    assert [song["id"] for song in async_client.get(f"/playlists/{playlist_id}/songs/").json()] == [second, first]
@@ -0,0 +1,54 @@
+from collections import Counter
+
+from sqlalchemy import create_engine, create_mock_engine, event, select, text
+
+import models
+from database import set_sqlite_pragma
+from generate_data import generate, reset_id_sequences
+
+def test_generated_songs_have_long_tail_playlists(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        counts = generate(conn, playlists=100, songs=5000, artists=50, seed=5, batch_size=1000)
+        sizes = Counter(conn.execute(select(models.Song.playlist_id)).scalars())
+        again = conn.execute(select(models.Song.title, models.Song.playlist_id).order_by(models.Song.id).limit(20)).all()
+    engine.dispose()
+
+    assert counts == {"playlists": 100, "songs": 5000}
+    # The ten biggest playlists hold far more than their 10% share
+    assert sum(size for _, size in sizes.most_common(10)) > 0.3 * 5000
+
+    other = create_engine(f"sqlite:///{tmp_path / 'again.db'}")
+    models.Base.metadata.create_all(bind=other)
+    with other.connect() as conn:
+        generate(conn, playlists=100, songs=5000, artists=50, seed=5, batch_size=1000)
+        assert conn.execute(select(models.Song.title, models.Song.playlist_id).order_by(models.Song.id).limit(20)).all() == again
+    other.dispose()
+
+def test_search_index_is_rebuilt_after_the_load(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        generate(conn, playlists=10, songs=500, artists=20, seed=5, batch_size=100)
+        title = conn.execute(select(models.Song.title).where(models.Song.id == 1)).scalar()
+        word = title.split()[0].lower()
+        hits = conn.execute(text("SELECT rowid FROM songs_fts WHERE songs_fts MATCH :q"), {"q": f'{{title}} : "{word}"'}).scalars().all()
+        expected = [song_id for song_id, song_title in conn.execute(select(models.Song.id, models.Song.title))
+                    if word in song_title.lower().split()]
+        triggers = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+    engine.dispose()
+
+    assert sorted(hits) == sorted(expected)
+    assert sorted(triggers) == ["songs_fts_delete", "songs_fts_insert", "songs_fts_update"]
+
+def test_id_sequences_are_reset_on_postgresql():
+    executed = []
+    engine = create_mock_engine("postgresql://", lambda sql, *args, **kwargs: executed.append(str(sql.compile(dialect=engine.dialect))))
+    reset_id_sequences(engine, [models.Playlist.__table__, models.Song.__table__])
+
+    assert len(executed) == 2
+    assert "setval(pg_get_serial_sequence(" in executed[0]
+    assert "max(playlists.id)" in executed[0]
+    assert "max(songs.id)" in executed[1]
@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+import metrics
+
+def test_metrics_count_requests_and_sql_per_route(client: TestClient, sample_playlist_data):
+    playlist_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    before = metrics.REQUESTS.value("GET", "/playlists/{playlist_id}", "200")
+    statements = metrics.REQUEST_SQL_STATEMENTS.sum("GET", "/playlists/{playlist_id}")
+
+    client.get(f"/playlists/{playlist_id}")
+
+    assert metrics.REQUESTS.value("GET", "/playlists/{playlist_id}", "200") == before + 1
+    assert metrics.REQUEST_SQL_STATEMENTS.sum("GET", "/playlists/{playlist_id}") > statements
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_request_sql_statements_count{method="GET",route="/playlists/{playlist_id}"}' in response.text
+    assert "db_pool_checkout_wait_seconds_count" in response.text
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import migrations
+
+def test_upgrade_then_check_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    with pytest.raises(migrations.SchemaVersionError):
+        migrations.check_schema(engine)
+
+    assert migrations.upgrade(engine) == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.upgrade(engine) == []
+    assert {"playlists", "songs", "schema_migrations"} <= set(inspect(engine).get_table_names())
+    migrations.check_schema(engine)
+    engine.dispose()
+
+def test_upgrade_orders_songs_of_a_database_created_before_migrations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE playlists (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, description VARCHAR, created_at DATETIME)"))
+        conn.execute(text(
+            "CREATE TABLE songs (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, artist VARCHAR NOT NULL, album VARCHAR, "
+            "duration INTEGER, playlist_id INTEGER NOT NULL REFERENCES playlists (id) ON DELETE CASCADE)"
+        ))
+        conn.execute(text("INSERT INTO playlists (id, name) VALUES (1, 'a'), (2, 'b')"))
+        conn.execute(text(
+            "INSERT INTO songs (id, title, artist, playlist_id) VALUES "
+            "(1, 's', 'x', 2), (2, 's', 'x', 1), (3, 's', 'x', 2), (4, 's', 'x', 2)"
+        ))
+
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT playlist_id, id, position FROM songs ORDER BY playlist_id, position")).all()
+    assert rows == [(1, 2, "a0"), (2, 1, "a0"), (2, 3, "a1"), (2, 4, "a2")]
+    indexes = {index["name"] for index in inspect(engine).get_indexes("songs")}
+    assert "ix_songs_playlist_id_position" in indexes
+    assert "ix_songs_playlist_id" not in indexes
+    engine.dispose()
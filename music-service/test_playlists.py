@@ -1,5 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from conftest import engine
 
 def test_create_playlist(client: TestClient, sample_playlist_data):
     response = client.post("/playlists/", json=sample_playlist_data)
@@ -121,4 +124,40 @@ def test_create_multiple_playlists(client: TestClient):
     playlist_names = [p["name"] for p in data]
     assert "Rock Playlist" in playlist_names
     assert "Jazz Playlist" in playlist_names
-    assert "Classical Playlist" in playlist_names
\ No newline at end of file
+    assert "Classical Playlist" in playlist_names
+
+def test_get_playlists_returns_song_stats_without_songs(client: TestClient, sample_song_data):
+    first = client.post("/playlists/", json={"name": "First"}).json()["id"]
+    client.post("/playlists/", json={"name": "Empty"})
+    client.post(f"/playlists/{first}/songs/", json=sample_song_data)
+    client.post(f"/playlists/{first}/songs/", json={**sample_song_data, "duration": None})
+    client.post(f"/playlists/{first}/songs/", json={**sample_song_data, "duration": 45})
+
+    data = client.get("/playlists/").json()
+    assert [(p["name"], p["song_count"], p["total_duration"]) for p in data] == [("First", 3, 400), ("Empty", 0, 0)]
+    assert all("songs" not in p for p in data)
+
+def test_get_playlists_include_songs_loads_songs_in_one_query(client: TestClient, sample_song_data):
+    for i in range(5):
+        playlist_id = client.post("/playlists/", json={"name": f"Playlist {i}"}).json()["id"]
+        for _ in range(i):
+            client.post(f"/playlists/{playlist_id}/songs/", json=sample_song_data)
+
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.get("/playlists/", params={"include": "songs"})
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [len(p["songs"]) for p in data] == [0, 1, 2, 3, 4]
+    assert [p["song_count"] for p in data] == [0, 1, 2, 3, 4]
+    # The playlists with their stats, then every song in one IN query
+    assert len(statements) == 2
+
+def test_get_playlists_rejects_unknown_include(client: TestClient):
+    assert client.get("/playlists/", params={"include": "artists"}).status_code == 422
@@ -0,0 +1,94 @@
+import random
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+import models
+import positions
+
+def test_key_between_keeps_order_under_random_inserts():
+    rng = random.Random(3)
+    keys = []
+    for _ in range(2000):
+        i = rng.randrange(len(keys) + 1)
+        lower = keys[i - 1] if i > 0 else None
+        upper = keys[i] if i < len(keys) else None
+        key = positions.key_between(lower, upper)
+        assert (lower is None or lower < key) and (upper is None or key < upper)
+        keys.insert(i, key)
+    assert len(set(keys)) == len(keys)
+
+def test_appends_and_prepends_stay_short():
+    last = first = None
+    for _ in range(10000):
+        last = positions.key_between(last, None)
+        first = positions.key_between(None, first)
+    assert len(last) <= 4 and len(first) <= 4
+    assert first < positions.FIRST_KEY < last
+
+def test_key_between_rejects_unordered_bounds():
+    with pytest.raises(ValueError):
+        positions.key_between("a1", "a0")
+
+def test_positions_compare_bytewise_on_postgresql():
+    assert 'position VARCHAR COLLATE "C"' in str(CreateTable(models.Song.__table__).compile(dialect=postgresql.dialect()))
+    assert "COLLATE" not in str(CreateTable(models.Song.__table__).compile(dialect=sqlite.dialect()))
+
+def test_rebalance_playlist_keeps_order(db_session):
+    playlist = models.Playlist(name="p")
+    db_session.add(playlist)
+    db_session.flush()
+    keys = ["a0", "a0V", "a0VV", "a0VVV", "a1"]
+    for title, key in zip("edcba", reversed(keys)):
+        db_session.add(models.Song(title=title, artist="x", playlist_id=playlist.id, position=key))
+    db_session.commit()
+
+    assert positions.rebalance_playlist(db_session, playlist.id) == 5
+    songs = db_session.query(models.Song).order_by(models.Song.position).all()
+    assert [song.title for song in songs] == list("abcde")
+    assert [song.position for song in songs] == list(positions.sequential_keys(5))
+
+def test_rebalance_keeps_a_concurrent_move(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/rebalance-race.db", connect_args={"check_same_thread": False, "timeout": 30})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        playlist = models.Playlist(name="p")
+        db.add(playlist)
+        db.flush()
+        songs = [models.Song(title=title, artist="x", playlist_id=playlist.id, position=key)
+                 for title, key in zip("abc", positions.sequential_keys(3))]
+        db.add_all(songs)
+        db.commit()
+        playlist_id, moved_id = playlist.id, songs[-1].id
+
+    def move_to_top():
+        with Session() as db:
+            song = db.get(models.Song, moved_id)
+            song.position = positions.key_between(None, positions.FIRST_KEY)
+            db.commit()
+
+    # Move a song right after the rebalance has read the order; the move must
+    # either commit first or wait for the rebalance to commit
+    mover = threading.Thread(target=move_to_top)
+    rebalance_thread = threading.get_ident()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def move_after_order_read(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == rebalance_thread and mover.ident is None \
+                and statement.startswith("SELECT songs.id AS songs_id"):
+            mover.start()
+            mover.join(timeout=0.5)
+
+    with Session() as db:
+        positions.rebalance_playlist(db, playlist_id)
+    mover.join()
+
+    with Session() as db:
+        titles = [title for title, in db.query(models.Song.title).order_by(models.Song.position, models.Song.id)]
+    assert titles == list("cab")
+    engine.dispose()
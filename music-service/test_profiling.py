@@ -0,0 +1,15 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from main import app
+from profiling import ProfilingMiddleware
+
+def test_request_with_token_writes_profile(client: TestClient, tmp_path):
+    profiled = TestClient(ProfilingMiddleware(app, token="secret", directory=str(tmp_path), interval_ms=1))
+
+    response = profiled.get("/playlists/", headers={"X-Profile": "secret"})
+
+    assert response.status_code == 200
+    assert os.path.exists(tmp_path / response.headers["X-Profile-File"])
+    assert "X-Profile-File" not in profiled.get("/playlists/").headers
@@ -0,0 +1,17 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import responses
+from responses import FastJSONResponse
+
+def test_song_lists_match_validated_wire_format(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    song = client.post(f"/playlists/{playlist_id}/songs/", json=sample_song_data).json()
+
+    assert client.get("/songs/").json() == [song]
+    assert client.get(f"/playlists/{playlist_id}/songs/").json() == [song]
+    assert client.get(f"/playlists/{playlist_id}").json()["songs"] == [song]
+
+def test_fast_json_response_without_orjson(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    assert FastJSONResponse({"title": "Café", "duration": None}).body == '{"title":"Café","duration":null}'.encode()
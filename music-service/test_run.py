@@ -0,0 +1,16 @@
+from run import server_config
+
+def test_development_profile_reloads_in_one_process():
+    config = server_config({})
+    assert config == {"app": "main:app", "host": "0.0.0.0", "port": 8000, "reload": True}
+
+def test_production_profile_runs_workers_without_reload():
+    config = server_config({"APP_ENV": "production", "WEB_CONCURRENCY": "4", "PORT": "9000"})
+    assert "reload" not in config
+    assert config["workers"] == 4
+    assert config["port"] == 9000
+    assert config["loop"] in ("uvloop", "asyncio")
+    assert config["http"] in ("httptools", "h11")
+    assert config["timeout_keep_alive"] == 75
+    assert config["timeout_graceful_shutdown"] == 8
+    assert config["access_log"] is False
@@ -0,0 +1,100 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import migrations
+import search
+
+def add_songs(client: TestClient, playlist_id, songs):
+    return client.post(f"/playlists/{playlist_id}/songs/bulk", json={"songs": songs}).json()["ids"]
+
+def titles(client: TestClient, q, **params):
+    response = client.get("/songs/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [song["title"] for song in response.json()]
+
+def test_match_query_quotes_terms_as_prefixes():
+    assert search.match_query('beat  it! "OR" *') == '"beat"* "it"* "OR"*'
+    assert search.match_query("  -*()  ") is None
+
+def test_search_prefix_and_ranking(client: TestClient, sample_playlist_data):
+    playlist_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    add_songs(client, playlist_id, [
+        {"title": "Quiet Night", "artist": "Someone", "album": "Thunder Road"},
+        {"title": "Thunderstruck", "artist": "AC/DC", "album": "The Razors Edge"},
+        {"title": "Hells Bells", "artist": "AC/DC", "album": "Back in Black"},
+        {"title": "Café Society", "artist": "Nobody", "album": None},
+    ])
+
+    # Title matches rank above album matches
+    assert titles(client, "thund") == ["Thunderstruck", "Quiet Night"]
+    # Every term has to match, in any column
+    assert titles(client, "ac/dc hell") == ["Hells Bells"]
+    assert titles(client, "cafe") == ["Café Society"]
+    # An exact title beats repeated terms, which bm25 alone ranks higher
+    add_songs(client, playlist_id, [{"title": "Love", "artist": "A"}, {"title": "Love Love Love", "artist": "B"}])
+    assert titles(client, " LOVE ") == ["Love", "Love Love Love"]
+    assert titles(client, "thund", limit=1) == ["Thunderstruck"]
+    assert titles(client, "?!") == []
+    assert titles(client, "zeppelin") == []
+    assert client.get("/songs/search", params={"q": ""}).status_code == 422
+
+def test_search_index_follows_changes(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    first, second = add_songs(client, playlist_id, [
+        {**sample_song_data, "title": "Bohemian Rhapsody"},
+        {**sample_song_data, "title": "Bicycle Race"},
+    ])
+    assert titles(client, "bohem") == ["Bohemian Rhapsody"]
+
+    client.delete(f"/songs/{first}")
+    assert titles(client, "bohem") == []
+
+    client.patch(f"/playlists/{playlist_id}/songs/{second}/move", json={"after_song_id": None})
+    assert titles(client, "bicycle") == ["Bicycle Race"]
+
+    # Songs removed by the playlist cascade leave the index too
+    client.delete(f"/playlists/{playlist_id}")
+    assert titles(client, "bicycle") == []
+
+def test_upgrade_indexes_existing_songs(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    migrations.upgrade(engine, target=3)
+    with engine.begin() as conn:
+        # The baseline already creates the index; remove it to look like an older database
+        for trigger in ("insert", "delete", "update"):
+            conn.execute(text(f"DROP TRIGGER songs_fts_{trigger}"))
+        conn.execute(text("DROP TABLE songs_fts"))
+        conn.execute(text("INSERT INTO playlists (id, name) VALUES (1, 'p')"))
+        conn.execute(text("INSERT INTO songs (id, title, artist, playlist_id, position) VALUES (1, 'Yellow Submarine', 'Beatles', 1, 'a0')"))
+
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        hits = conn.execute(text("SELECT rowid FROM songs_fts WHERE songs_fts MATCH 'beat*'")).scalars().all()
+    assert hits == [1]
+    engine.dispose()
+
+def test_broad_queries_rank_title_matches_first(client: TestClient, sample_playlist_data, monkeypatch):
+    playlist_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    # The exact title match is the oldest song
+    add_songs(client, playlist_id, [{"title": "Love", "artist": "Old"}])
+    add_songs(client, playlist_id, [{"title": f"Song {i}", "artist": "Love"} for i in range(5)])
+    add_songs(client, playlist_id, [{"title": "Lovely", "artist": "New"}])
+
+    response = client.get("/songs/search", params={"q": "love"})
+    assert response.headers["X-Search-Ranking"] == "exact"
+    assert response.headers["X-Search-Matches"] == "7"
+
+    monkeypatch.setattr(search, "EXACT_RANK_MAX_MATCHES", 3)
+    monkeypatch.setattr(search, "RANK_WINDOW", 1)
+    response = client.get("/songs/search", params={"q": "love", "limit": 4})
+    assert response.headers["X-Search-Ranking"] == "title"
+    assert response.headers["X-Search-Matches"] == "7"
+    # Title matches ranked exactly, then the newest other matches
+    assert [song["title"] for song in response.json()] == ["Love", "Lovely", "Song 4"]
+
+    monkeypatch.setattr(search, "EXACT_RANK_MAX_MATCHES", 1)
+    monkeypatch.setattr(search, "RANK_WINDOW", 0)
+    response = client.get("/songs/search", params={"q": "love"})
+    assert response.headers["X-Search-Ranking"] == "recent"
+    assert [song["title"] for song in response.json()] == ["Lovely"]
@@ -0,0 +1,40 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import engine
+from slow_queries import SlowQueryLog
+
+@pytest.fixture
+def slow_query_log():
+    log = SlowQueryLog(threshold_ms=0, scan_repeats=2)
+    log.install(engine)
+    yield log
+    log.remove(engine)
+
+def test_slow_queries_are_logged_with_route_and_plan(client: TestClient, slow_query_log, sample_playlist_data, caplog):
+    client.post("/playlists/", json=sample_playlist_data)
+
+    with caplog.at_level(logging.WARNING, logger="slow_queries"):
+        client.get("/playlists/")
+        client.get("/playlists/")
+
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Slow query")]
+    # Song counts for the listing are aggregated over the whole songs table
+    assert any("route=GET /playlists/" in m and "SCAN songs" in m for m in slow)
+    assert slow_query_log.scans[("songs", "GET /playlists/")] == 2
+    flagged = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Repeated full scan")]
+    assert "Repeated full scan of songs from route=GET /playlists/ (2 slow queries); consider an index" in flagged
+
+def test_fast_queries_are_not_logged(client: TestClient, sample_playlist_data, caplog):
+    log = SlowQueryLog(threshold_ms=60_000)
+    log.install(engine)
+    try:
+        with caplog.at_level(logging.WARNING, logger="slow_queries"):
+            client.post("/playlists/", json=sample_playlist_data)
+            client.get("/playlists/")
+    finally:
+        log.remove(engine)
+    assert not caplog.records
+    assert not log.scans
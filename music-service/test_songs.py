@@ -1,5 +1,9 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+import positions
+from conftest import engine
 
 def create_playlist_and_get_id(client: TestClient, playlist_data):
     """Helper function to create a playlist and return its ID"""
@@ -154,4 +158,180 @@ def test_songs_across_multiple_playlists(client: TestClient):
     
     # Verify total songs count
     all_songs_response = client.get("/songs/")
-    assert len(all_songs_response.json()) == 2
\ No newline at end of file
+    assert len(all_songs_response.json()) == 2
+
+def test_get_playlist_songs_pages_with_cursor(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    other_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    song_ids = []
+    for i in range(5):
+        song_ids.append(client.post(f"/playlists/{playlist_id}/songs/", json={**sample_song_data, "title": f"Song {i}"}).json()["id"])
+        client.post(f"/playlists/{other_id}/songs/", json=sample_song_data)
+
+    seen, after_id = [], None
+    while True:
+        params = {"limit": 2}
+        if after_id is not None:
+            params["after_id"] = after_id
+        response = client.get(f"/playlists/{playlist_id}/songs/", params=params)
+        assert response.status_code == 200
+        seen.extend(song["id"] for song in response.json())
+        after_id = response.headers.get("X-Next-Cursor")
+        if after_id is None:
+            break
+    assert seen == song_ids
+
+def test_get_all_songs_is_paginated(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = client.post("/playlists/", json=sample_playlist_data).json()["id"]
+    song_ids = [client.post(f"/playlists/{playlist_id}/songs/", json=sample_song_data).json()["id"] for _ in range(3)]
+
+    response = client.get("/songs/", params={"limit": 2})
+    assert [song["id"] for song in response.json()] == song_ids[:2]
+    assert response.headers["X-Next-Cursor"] == str(song_ids[1])
+
+    response = client.get("/songs/", params={"limit": 2, "after_id": song_ids[1]})
+    assert [song["id"] for song in response.json()] == song_ids[2:]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get("/songs/", params={"limit": 501}).status_code == 422
+
+def test_playlist_songs_query_uses_index(db_session):
+    plan = db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT * FROM songs WHERE playlist_id = 1 AND position > 'a5' ORDER BY position, id LIMIT 101"
+    )).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "USING INDEX ix_songs_playlist_id_position" in details
+    assert "TEMP B-TREE" not in details
+
+def add_songs(client: TestClient, playlist_id, sample_song_data, count):
+    return [
+        client.post(f"/playlists/{playlist_id}/songs/", json={**sample_song_data, "title": f"Song {i}"}).json()["id"]
+        for i in range(count)
+    ]
+
+def playlist_order(client: TestClient, playlist_id):
+    return [song["id"] for song in client.get(f"/playlists/{playlist_id}/songs/").json()]
+
+def test_move_song(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    a, b, c, d = add_songs(client, playlist_id, sample_song_data, 4)
+
+    response = client.patch(f"/playlists/{playlist_id}/songs/{d}/move", json={"after_song_id": a})
+    assert response.status_code == 200
+    assert response.json()["id"] == d
+    assert playlist_order(client, playlist_id) == [a, d, b, c]
+
+    client.patch(f"/playlists/{playlist_id}/songs/{c}/move", json={"after_song_id": None})
+    assert playlist_order(client, playlist_id) == [c, a, d, b]
+
+    client.patch(f"/playlists/{playlist_id}/songs/{c}/move", json={"after_song_id": b})
+    assert playlist_order(client, playlist_id) == [a, d, b, c]
+    # Detail view and new songs follow the same order
+    assert [song["id"] for song in client.get(f"/playlists/{playlist_id}").json()["songs"]] == [a, d, b, c]
+    e, = add_songs(client, playlist_id, sample_song_data, 1)
+    assert playlist_order(client, playlist_id) == [a, d, b, c, e]
+
+def test_move_song_writes_only_the_moved_row(client: TestClient, db_session, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    song_ids = add_songs(client, playlist_id, sample_song_data, 5)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        client.patch(f"/playlists/{playlist_id}/songs/{song_ids[0]}/move", json={"after_song_id": song_ids[3]})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    writes = [(statement, parameters) for statement, parameters in statements if not statement.lstrip().startswith("SELECT")]
+    assert len(writes) == 1
+    assert writes[0][0].startswith("UPDATE songs SET position")
+
+def test_move_song_errors(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    other_id = create_playlist_and_get_id(client, sample_playlist_data)
+    song_id, = add_songs(client, playlist_id, sample_song_data, 1)
+    other_song, = add_songs(client, other_id, sample_song_data, 1)
+
+    assert client.patch(f"/playlists/{other_id}/songs/{song_id}/move", json={}).status_code == 404
+    response = client.patch(f"/playlists/{playlist_id}/songs/{song_id}/move", json={"after_song_id": song_id})
+    assert response.status_code == 400
+    response = client.patch(f"/playlists/{playlist_id}/songs/{song_id}/move", json={"after_song_id": other_song})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Song to move after not found"
+
+def test_long_position_keys_are_rebalanced(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    song_ids = add_songs(client, playlist_id, sample_song_data, 3)
+
+    # Keep moving the last song in between the first two; each move
+    # narrows the gap and lengthens the key
+    first = song_ids[0]
+    for _ in range(200):
+        moving = playlist_order(client, playlist_id)[-1]
+        client.patch(f"/playlists/{playlist_id}/songs/{moving}/move", json={"after_song_id": first})
+
+    songs = client.get(f"/playlists/{playlist_id}/songs/").json()
+    assert len({song["id"] for song in songs}) == 3
+    assert max(len(song["position"]) for song in songs) <= positions.MAX_POSITION_LENGTH + 1
+
+def test_playlist_songs_cursor_must_be_in_playlist(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    other_id = create_playlist_and_get_id(client, sample_playlist_data)
+    other_song, = add_songs(client, other_id, sample_song_data, 1)
+    response = client.get(f"/playlists/{playlist_id}/songs/", params={"after_id": other_song})
+    assert response.status_code == 400
+
+def test_bulk_add_songs(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    existing, = add_songs(client, playlist_id, sample_song_data, 1)
+    songs = [{**sample_song_data, "title": f"Track {i}"} for i in range(1200)]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post(f"/playlists/{playlist_id}/songs/bulk", json={"songs": songs})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    ids = response.json()["ids"]
+    assert len(ids) == 1200
+
+    listed = []
+    for after_id in (None, existing, ids[498], ids[998]):
+        params = {"limit": 500} if after_id is None else {"limit": 500, "after_id": after_id}
+        listed.extend(client.get(f"/playlists/{playlist_id}/songs/", params=params).json())
+    # Appended after the existing song, in request order
+    assert [song["id"] for song in listed][:2] == [existing, ids[0]]
+    by_id = {song["id"]: song["title"] for song in listed}
+    assert [by_id[song_id] for song_id in ids] == [song["title"] for song in songs]
+    # Inserts go out as multi-row statements, never one per song
+    assert len([statement for statement in statements if statement.startswith("INSERT")]) == 2
+
+def test_bulk_add_songs_validation(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    assert client.post("/playlists/999/songs/bulk", json={"songs": [sample_song_data]}).status_code == 404
+    assert client.post(f"/playlists/{playlist_id}/songs/bulk", json={"songs": []}).status_code == 422
+    response = client.post(f"/playlists/{playlist_id}/songs/bulk", json={"songs": [sample_song_data, {"title": "No artist"}]})
+    assert response.status_code == 422
+    assert client.get(f"/playlists/{playlist_id}/songs/").json() == []
+
+def test_bulk_delete_songs(client: TestClient, sample_playlist_data, sample_song_data):
+    playlist_id = create_playlist_and_get_id(client, sample_playlist_data)
+    other_id = create_playlist_and_get_id(client, sample_playlist_data)
+    song_ids = add_songs(client, playlist_id, sample_song_data, 4)
+    other_song, = add_songs(client, other_id, sample_song_data, 1)
+
+    response = client.request("DELETE", f"/playlists/{playlist_id}/songs/bulk",
+                              json={"ids": [song_ids[2], song_ids[0], other_song]})
+    assert response.status_code == 200
+    assert response.json() == {"ids": [song_ids[0], song_ids[2]]}
+    assert playlist_order(client, playlist_id) == [song_ids[1], song_ids[3]]
+    assert playlist_order(client, other_id) == [other_song]
+
+    response = client.request("DELETE", "/playlists/999/songs/bulk", json={"ids": [song_ids[1]]})
+    assert response.status_code == 404